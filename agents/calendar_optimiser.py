@@ -1,39 +1,67 @@
 # agents/calendar_optimiser.py
-from typing import List
+from typing import List, Optional
 from agents.schemas import TimeBlock, CalendarResult, CalendarEvent, Task
-from tools.calendar_provider import get_events, propose_time_blocks
+from tools.calendar_provider import get_events, plan_time_blocks
+
+# Upcoming events shown in the result; the full list is used as busy windows
+DISPLAY_EVENTS = 5
 
 
 class CalendarOptimiser:
     """Fetch events and propose time blocks for tasks."""
 
-    def run(self, tasks: List[Task], block_hours: int = 1) -> dict:
-        logs: List[str] = []
-        events: List[CalendarEvent] = []
+    def fetch(self, limit: int = 50, token_path: Optional[str] = None) -> dict:
+        """Fetch the events used both for display and as busy windows.
 
+        `events` is None when the fetch failed, so callers can tell an
+        empty calendar from an unknown one.
+        """
         try:
-            events = get_events(5)
-            logs.append(f"Fetched {len(events)} upcoming events.")
+            events = get_events(limit, token_path=token_path)
         except Exception as e:
-            return {
-                "events": [],
-                "proposals": [],
-                "logs": [f"ERROR: Calendar fetch failed - {e}"],
-            }
+            return {"events": None, "logs": [f"ERROR: Calendar fetch failed - {e}"]}
+        return {"events": events, "logs": [f"Fetched {len(events)} upcoming events."]}
+
+    def run(
+        self,
+        tasks: List[Task],
+        block_hours: int = 1,
+        lookahead_days: int = 3,
+        events: Optional[List[CalendarEvent]] = None,
+        token_path: Optional[str] = None,
+    ) -> dict:
+        logs: List[str] = []
+
+        if events is None:
+            fetched = self.fetch(token_path=token_path)
+            if fetched["events"] is None:
+                return {"events": [], "proposals": [], "logs": fetched["logs"]}
+            events = fetched["events"]
+            logs.extend(fetched["logs"])
 
         try:
             # Normalize tasks to dicts before passing downstream
             task_dicts = [t.model_dump() if hasattr(t, "dict") else t for t in tasks]
-            raw = propose_time_blocks(task_dicts, block_hours=block_hours)
-            proposals = [TimeBlock(**b) for b in raw]
-            logs.append(f"Proposed {len(proposals)} time blocks.")
+            plan = plan_time_blocks(task_dicts, block_hours=block_hours, lookahead_days=lookahead_days, events=events)
+            proposals = [TimeBlock(**b) for b in plan.blocks]
+            placed = len(task_dicts) - len(plan.unscheduled)
+            logs.append(f"Proposed {len(proposals)} time blocks for {placed} tasks.")
+            for t in plan.late:
+                logs.append(f"WARNING: '{t.get('title')}' is scheduled past its due date {t.get('due_date')}.")
+            for t in plan.unscheduled:
+                logs.append(f"WARNING: No room for '{t.get('title')}' in the next {lookahead_days} days.")
         except Exception as e:
             return {
-                "events": [e.model_dump() for e in events],
+                "events": [e.model_dump() for e in events[:DISPLAY_EVENTS]],
                 "proposals": [],
                 "logs": logs + [f"ERROR: Proposal failed - {e}"],
             }
 
         # Normalize CalendarResult to dict before returning
-        result = CalendarResult(events=events, proposals=proposals, logs=logs)
+        result = CalendarResult(
+            events=events[:DISPLAY_EVENTS],
+            proposals=proposals,
+            unscheduled=[t.get("id") or t.get("title") for t in plan.unscheduled],
+            logs=logs,
+        )
         return result.model_dump()
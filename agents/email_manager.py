@@ -2,27 +2,33 @@
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from tools.llm import get_llm
-from tools.gmail_provider import fetch_emails
-from agents.schemas import Summary, Task, EmailResponse
+from tools.gmail_provider import commit_checkpoint, fetch_new_emails
+from agents.schemas import Summary, Task, EmailResponse, PackedEmailsResponse
 from agents.meeting_summariser import MeetingSummariser
-import dateparser, re
+from agents.pre_classifier import PreClassifier
+from tools.async_runner import run_sync
+from tools.due_dates import normalize_due, warm_up
+from tools.local_store import cache_path
+from tools.mail_text import build_email_prompt
+from tools.progress import get_progress_store
+from tools.task_dedup import TaskDedupIndex
+import asyncio, hashlib, os, re, zlib
+from typing import Callable
 
+DOC_LINK = re.compile(r"https://docs\.google\.com/document/d/([a-zA-Z0-9-_]+)")
 
-def normalize_due(raw: str) -> str | None:
-    if not raw:
-        return None
-    dt = dateparser.parse(raw, settings={"PREFER_DATES_FROM": "future"})
-    if dt:
-        return dt.strftime("%Y-%m-%d")
-    return None
+# Token budget for one email's text in a prompt
+EMAIL_TOKEN_BUDGET = int(os.getenv("EMAIL_TOKEN_BUDGET", "1000"))
+# Token budget for the email texts packed into one classification call (0 disables packing)
+PACK_TOKENS = int(os.getenv("EMAIL_PACK_TOKENS", "3000"))
+MAX_PACK = 8
+# About one email in PACK_BOUNDARY_EVERY ends a pack that holds at least MIN_PACK_CUT emails
+PACK_BOUNDARY_EVERY = 4
+MIN_PACK_CUT = 3
+# Allowance per packed email for its share of the JSON reply
+PACK_OUTPUT_TOKENS = 80
 
-
-class EmailManager:
-    def __init__(self, source_label: str = "gmail"):
-        self.source_label = source_label
-        self.parser = PydanticOutputParser(pydantic_object=EmailResponse)
-        self.prompt = ChatPromptTemplate.from_template(
-            """
+CLASSIFY_RULES = """
             You are an AI assistant that extracts actionable tasks from emails.
 
             Definition: Actionable Task  
@@ -52,7 +58,23 @@ class EmailManager:
             - If no deadline is mentioned, leave both as null.  
             - Do not include deadlines in the summary text — they must always appear in the task fields.  
 
+"""
+
 
+class EmailManager:
+    def __init__(
+        self,
+        source_label: str = "gmail",
+        max_concurrency: int = 8,
+        pack_tokens: int | None = None,
+        token_budget: int = EMAIL_TOKEN_BUDGET,
+    ):
+        self.source_label = source_label
+        self.token_budget = token_budget
+        self.pack_tokens = PACK_TOKENS if pack_tokens is None else pack_tokens
+        self.parser = PydanticOutputParser(pydantic_object=EmailResponse)
+        self.prompt = ChatPromptTemplate.from_template(
+            CLASSIFY_RULES + """
             EMAIL:  
             {email}  
 
@@ -60,85 +82,289 @@ class EmailManager:
             """
         )
         self.chain = self.prompt | get_llm() | self.parser
+        # Packed mode: several short emails share one copy of the rules and format instructions
+        self.pack_parser = PydanticOutputParser(pydantic_object=PackedEmailsResponse)
+        self.pack_prompt = ChatPromptTemplate.from_template(
+            CLASSIFY_RULES + """
+            Apply the steps above to EACH email below independently.
+            Return exactly one entry per email, with email_id copied from its header.
+
+            EMAILS:  
+            {emails}  
+
+            {format_instructions}  
+            """
+        )
+        self.pack_chain = self.pack_prompt | get_llm() | self.pack_parser
         self.meeting_agent = MeetingSummariser()  # added here
+        self.pre_classifier = PreClassifier()
+        warm_up()  # dateparser loads its locale data while emails are fetched
+        self.max_concurrency = max_concurrency
+
+    def run(
+        self,
+        n: int = 3,
+        max_concurrency: int | None = None,
+        account: dict | None = None,
+        on_result=None,
+        run_id: str | None = None,
+    ):
+        """Synchronous entry point; classifies the fetched emails concurrently."""
+        return run_sync(self.arun(n, max_concurrency=max_concurrency, account=account, on_result=on_result, run_id=run_id))
+
+    async def arun(
+        self,
+        n: int = 3,
+        max_concurrency: int | None = None,
+        account: dict | None = None,
+        on_result: Callable[[dict], None] | None = None,
+        run_id: str | None = None,
+    ):
+        """`account` overrides the mailbox and Google tokens (see orchestration.batch).
 
-    def run(self, n: int = 3):
-        logs, summaries, all_tasks = [], [], []
+        `on_result` is called with each email's {summaries, tasks, logs} as
+        soon as it is classified, before duplicates are merged. With a
+        `run_id`, each result is also saved as it completes, and emails the
+        same run already classified are reused instead of sent to the LLM.
+        """
+        account = account or {}
+        emit = on_result or (lambda res: None)
+        progress = get_progress_store() if run_id else None
+        logs, summaries, all_tasks, status = [], [], [], {}
         try:
-            emails = fetch_emails(n)
+            emails, pending_checkpoint = await asyncio.to_thread(
+                fetch_new_emails, n, user=account.get("email_user"), password=account.get("email_pass")
+            )
             logs.append(f"Fetched {len(emails)} emails from Gmail.")
         except Exception as e:
             return {"summaries": [], "tasks": [], "logs": [f"ERROR: Gmail fetch failed - {e}"]}
 
-        for em in emails:
+        # Bounded fan-out: at most `max_concurrency` LLM round trips in flight
+        limit = asyncio.Semaphore(max(1, max_concurrency or self.max_concurrency))
+        docs_token = account.get("docs_token")
+        results: list = [None] * len(emails)
+
+        def done(i: int, res: dict) -> None:
+            results[i] = res
+            status[str(emails[i]["id"])] = "failed" if any(l.startswith("ERROR") for l in res["logs"]) else "done"
+            if progress:
+                progress.record_email(run_id, emails[i]["id"], res)
+            emit(res)
+
+        # Emails this run classified before it was interrupted
+        resumed = progress.email_results(run_id) if progress else {}
+        reused = [i for i, em in enumerate(emails) if str(em["id"]) in resumed]
+        for i in reused:
+            results[i] = resumed[str(emails[i]["id"])]
+            status[str(emails[i]["id"])] = "resumed"
+            emit(results[i])
+        if reused:
+            logs.append(f"Resumed run: reused {len(reused)} already classified emails.")
+
+        # Confident rule matches (bulk mail) never reach the LLM
+        verdicts = []
+        for i, em in enumerate(emails):
+            if results[i] is not None or DOC_LINK.search(em["body"]):
+                continue
+            verdict = self.pre_classifier.classify(em)
+            verdicts.append(verdict)
+            if verdict.category is not None:
+                res = self._apply(em, EmailResponse(summary="", category=verdict.category))
+                res["logs"][-1] += f" (rules: {', '.join(verdict.rules)}; confidence {verdict.confidence})"
+                done(i, res)
+        if verdicts:
+            logs.append(self.pre_classifier.report(verdicts))
+
+        pending = [i for i, res in enumerate(results) if res is None]
+        for i in pending:
+            if not DOC_LINK.search(emails[i]["body"]):
+                emails[i] = self._prepare(emails[i])
+        singles, packs = self._plan(emails, pending)
+
+        async def single(i: int) -> None:
+            async with limit:
+                res = await self._process_email(emails[i], docs_token=docs_token)
+            done(i, res)
+
+        async def packed(idxs: list) -> None:
+            async with limit:
+                pack_results = await self._process_pack([emails[i] for i in idxs], docs_token=docs_token)
+            for i, res in zip(idxs, pack_results):
+                done(i, res)
+
+        await asyncio.gather(*(single(i) for i in singles), *(packed(p) for p in packs))
+        if packs:
+            logs.append(f"Packed {sum(map(len, packs))} short emails into {len(packs)} LLM calls.")
+
+        if pending_checkpoint:
+            # only now: a failed email, or one lost to a crash, must be fetched again
+            commit_checkpoint(pending_checkpoint, [uid for uid, st in status.items() if st == "failed"])
+
+        # results stay in inbox order
+        for res in results:
+            summaries.extend(res["summaries"])
+            all_tasks.extend(res["tasks"])
+            logs.extend(res["logs"])
+
+        # Near-duplicate tasks across emails, meeting notes and earlier runs
+        user = account.get("email_user") or os.getenv("EMAIL_USER") or "default"
+        index = TaskDedupIndex(cache_path("tasks", f"dedup-{hashlib.sha1(user.encode()).hexdigest()[:12]}.json"))
+        all_tasks, earlier, merged = index.dedupe(all_tasks)
+        index.save()
+        logs.extend(merged)
+
+        return {"summaries": summaries, "tasks": all_tasks, "earlier_tasks": earlier, "logs": logs, "email_status": status}
+
+    def _prepare(self, em: dict) -> dict:
+        """Attach the token-budgeted prompt text for an email."""
+        text, tokens, full = build_email_prompt(em["subject"], em["body"], self.token_budget)
+        return {**em, "prompt": text, "prompt_tokens": tokens, "full_tokens": full}
+
+    def _email_text(self, em: dict) -> str:
+        if "prompt" not in em:
+            em = self._prepare(em)
+        return em["prompt"]
+
+    def _plan(self, emails: list, idxs: list) -> tuple:
+        """Split the emails at `idxs` into single calls and packs of short emails, in inbox order.
+
+        A pack closes once its texts (plus a reply allowance each) would
+        exceed `pack_tokens` or it holds MAX_PACK emails. Once it holds
+        MIN_PACK_CUT emails it also closes after an email whose id hashes to
+        a cut point. As in doc_chunks.chunk_notes, that keeps most boundaries
+        in place when the fetched window slides, so repeated packs are still
+        served from the LLM cache. Meeting-note emails and anything longer
+        than a quarter of the budget go alone.
+        """
+        singles, packs, current, used = [], [], [], 0
+        for i in idxs:
+            em = emails[i]
+            if not self.pack_tokens or DOC_LINK.search(em["body"]):
+                singles.append(i)
+                continue
+            cost = em.get("prompt_tokens", 0) + PACK_OUTPUT_TOKENS
+            if cost > self.pack_tokens // 4:
+                singles.append(i)
+                continue
+            if current and (used + cost > self.pack_tokens or len(current) >= MAX_PACK):
+                packs.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += cost
+            if len(current) >= MIN_PACK_CUT and zlib.crc32(str(em["id"]).encode()) % PACK_BOUNDARY_EVERY == 0:
+                packs.append(current)
+                current, used = [], 0
+        if current:
+            packs.append(current)
+        # a pack of one is just a single call
+        singles.extend(p[0] for p in packs if len(p) == 1)
+        return sorted(singles), [p for p in packs if len(p) > 1]
+
+    async def _process_pack(self, pack: list, docs_token: str | None = None) -> list:
+        """Classify several short emails in one call.
+
+        Emails missing from the reply (or all of them, if it fails to parse)
+        fall back to single calls.
+        """
+        by_id, failure = {}, None
+        try:
+            entries = "\n\n".join(f"=== email_id: {em['id']} ===\n{self._email_text(em)}" for em in pack)
+            reply: PackedEmailsResponse = await self.pack_chain.ainvoke({
+                "emails": entries,
+                "format_instructions": self.pack_parser.get_format_instructions()
+            })
+            by_id = {item.email_id.strip(): item for item in reply.emails}
+        except Exception as e:
+            failure = e
+
+        async def one(em: dict) -> dict:
+            item = by_id.get(str(em["id"]))
+            if item is None:
+                return await self._process_email(em, docs_token=docs_token)
             try:
-                email_text = f"Subject: {em['subject']}\n\n{em['body']}"
+                return self._apply(em, item)
+            except Exception as e:
+                return {"summaries": [], "tasks": [], "logs": [f"ERROR: Processing '{em['subject']}' - {e}"]}
 
-                # detect meeting notes with Google Doc link 
-                doc_match = re.search(r"https://docs\.google\.com/document/d/([a-zA-Z0-9-_]+)", em["body"])
-                if doc_match:
-                    doc_id = doc_match.group(1)
-                    logs.append(f"Detected meeting notes in '{em['subject']}' - using Google Doc {doc_id}")
+        results = await asyncio.gather(*(one(em) for em in pack))
+        if failure is not None:
+            results[0]["logs"].insert(0, f"Packed classification of {len(pack)} emails failed ({failure}); retried individually")
+        return results
 
-                    meeting_result = self.meeting_agent.run(doc_id)
+    def _apply(self, em: dict, result: EmailResponse) -> dict:
+        """Turn a classification into summaries, tasks and logs for one email."""
+        logs, summaries, tasks = [], [], []
+        note = ""
+        if "prompt_tokens" in em:
+            note = f" ({em['prompt_tokens']} prompt tokens"
+            note += f", truncated from {em['full_tokens']})" if em["full_tokens"] > em["prompt_tokens"] else ")"
 
-                    summaries.append(Summary(
-                        subject=em["subject"],
-                        category="MEETING",
-                        text=meeting_result.summary
-                    ))
+        if result.category == "PROMO":
+            logs.append(f"Ignored PROMO email: '{em['subject']}'{note}")
+            return {"summaries": summaries, "tasks": tasks, "logs": logs}
 
-                for idx, t in enumerate(meeting_result.tasks):
-                    due_date = normalize_due(t.due_raw)
-                    all_tasks.append(t.copy(update={
-                        "id": f"{em['id']}_mt_{idx}",
-                        "source": "meeting",
-                        "due_date": due_date
-                    }))
+        summaries.append(Summary(
+            subject=em["subject"],
+            category=result.category,
+            text=result.summary
+        ))
 
-                    continue
+        for idx, t in enumerate(result.tasks):
+            due_date = normalize_due(t.due_raw)
+            tasks.append(Task(
+                id=f"{em['id']}_{idx}",
+                title=t.title,
+                source=self.source_label,
+                priority="MED",
+                due_raw=t.due_raw,
+                due_date=due_date,
+                estimate_min=None,
+                status="PENDING",
+                confidence=t.confidence
+            ))
 
-                # Email classification
-                result: EmailResponse = self.chain.invoke({
-                    "email": email_text,
-                    "format_instructions": self.parser.get_format_instructions()
-                })
+        logs.append(f"Processed '{em['subject']}' - {len(result.tasks)} tasks{note}")
+        return {"summaries": summaries, "tasks": tasks, "logs": logs}
 
-                if result.category == "PROMO":
-                    logs.append(f"Ignored PROMO email: '{em['subject']}'")
-                    continue
+    async def _process_email(self, em: dict, docs_token: str | None = None) -> dict:
+        """Classify a single email; errors are isolated to this email."""
+        logs, summaries, tasks = [], [], []
+        try:
+            email_text = self._email_text(em)
+
+            # detect meeting notes with Google Doc link 
+            doc_match = DOC_LINK.search(em["body"])
+            if doc_match:
+                doc_id = doc_match.group(1)
+                logs.append(f"Detected meeting notes in '{em['subject']}' - using Google Doc {doc_id}")
+
+                meeting_result = await self.meeting_agent.arun(doc_id, token_path=docs_token)
 
                 summaries.append(Summary(
                     subject=em["subject"],
-                    category=result.category,
-                    text=result.summary
+                    category="MEETING",
+                    text=meeting_result.summary
                 ))
 
-                for idx, t in enumerate(result.tasks):
+                for idx, t in enumerate(meeting_result.tasks):
                     due_date = normalize_due(t.due_raw)
-                    all_tasks.append(Task(
-                        id=f"{em['id']}_{idx}",
-                        title=t.title,
-                        source=self.source_label,
-                        priority="MED",
-                        due_raw=t.due_raw,
-                        due_date=due_date,
-                        estimate_min=None,
-                        status="PENDING",
-                        confidence=t.confidence
-                    ))
-
-                logs.append(f"Processed '{em['subject']}' - {len(result.tasks)} tasks")
+                    tasks.append(t.model_copy(update={
+                        "id": f"{em['id']}_mt_{idx}",
+                        "source": "meeting",
+                        "due_date": due_date
+                    }))
 
-            except Exception as e:
-                logs.append(f"ERROR: Processing '{em['subject']}' - {e}")
+                logs.append(f"Processed '{em['subject']}' - {len(meeting_result.tasks)} tasks")
+                return {"summaries": summaries, "tasks": tasks, "logs": logs}
+
+            # Email classification
+            result: EmailResponse = await self.chain.ainvoke({
+                "email": email_text,
+                "format_instructions": self.parser.get_format_instructions()
+            })
+            return self._apply(em, result)
 
-        # Deduplicate tasks by title+due_date
-        unique = {}
-        for task in all_tasks:
-            key = (task.title.strip().lower(), task.due_date)
-            if key not in unique:
-                unique[key] = task
-        all_tasks = list(unique.values())
+        except Exception as e:
+            logs.append(f"ERROR: Processing '{em['subject']}' - {e}")
 
-        return {"summaries": summaries, "tasks": all_tasks, "logs": logs}
+        return {"summaries": summaries, "tasks": tasks, "logs": logs}
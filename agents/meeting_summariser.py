@@ -1,13 +1,59 @@
 # agents/meeting_summariser.py
+import asyncio
+import hashlib
+import os
+import re
+from typing import Dict, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from tools.llm import get_llm
-from tools.docs_provider import fetch_doc_text
+from tools.async_runner import run_sync
+from tools.doc_chunks import chunk_notes
+from tools.docs_provider import fetch_doc
+from tools.local_store import cache_path, load_json, save_json
+from tools.tokens import count_tokens
 from agents.schemas import MeetingResponse
 
+# Notes longer than this are summarised chunk by chunk in parallel
+CHUNK_TOKENS = int(os.getenv("MEETING_CHUNK_TOKENS", "1500"))
+
+
+def _normalise(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", text.lower()).split())
+
+
+def _task_key(title: str, due_raw: str | None) -> tuple:
+    return _normalise(title), (due_raw or "").strip().lower()
+
+
+def merge_responses(parts: list) -> MeetingResponse:
+    """Combine per-chunk results in document order, dropping repeated sentences, points and tasks."""
+    sentences, points, tasks = [], [], []
+    seen_sentences, seen_points, seen_tasks = set(), set(), set()
+    for part in parts:
+        # each chunk tends to restate the meeting's purpose ("Weekly sync.")
+        for sentence in re.split(r"(?<=[.!?])\s+", part.summary.strip()):
+            key = _normalise(sentence)
+            if key and key not in seen_sentences:
+                seen_sentences.add(key)
+                sentences.append(sentence)
+        for p in part.discussion_points:
+            if p.strip().lower() not in seen_points:
+                seen_points.add(p.strip().lower())
+                points.append(p)
+        for t in part.tasks:
+            key = _task_key(t.title, t.due_raw)
+            if key not in seen_tasks:
+                seen_tasks.add(key)
+                tasks.append(t)
+    return MeetingResponse(summary=" ".join(sentences), discussion_points=points, tasks=tasks)
+
 
 class MeetingSummariser:
-    def __init__(self):
+    def __init__(self, chunk_tokens: int = CHUNK_TOKENS):
+        self.chunk_tokens = chunk_tokens
+        # One summary per doc in flight; forwarded copies of it in the same inbox wait for it
+        self._inflight: Dict[Tuple[str, str | None], asyncio.Task] = {}
         self.parser = PydanticOutputParser(pydantic_object=MeetingResponse)
 
         self.prompt = ChatPromptTemplate.from_template(
@@ -30,11 +76,69 @@ class MeetingSummariser:
 
         self.chain = self.prompt | get_llm() | self.parser
 
-    def run(self, doc_id: str) -> MeetingResponse:
-        notes = fetch_doc_text(doc_id)
-        return self.chain.invoke(
+    def _cached(self, doc_id: str, revision_id: str | None) -> MeetingResponse | None:
+        """Summary from an earlier run if the doc has not changed since."""
+        if not revision_id:
+            return None
+        cached = load_json(cache_path("meetings", f"{doc_id}.json"))
+        if cached and cached.get("revision_id") == revision_id:
+            return MeetingResponse(**cached["result"])
+        return None
+
+    def _store(self, doc_id: str, revision_id: str | None, result: MeetingResponse) -> None:
+        if revision_id:
+            save_json(
+                cache_path("meetings", f"{doc_id}.json"),
+                {"revision_id": revision_id, "result": result.model_dump()},
+            )
+
+    async def _summarise(self, notes: str) -> MeetingResponse:
+        return await self.chain.ainvoke(
             {
                 "notes": notes,
                 "format_instructions": self.parser.get_format_instructions(),
             }
         )
+
+    async def _summarise_chunks(self, doc_id: str, notes: str) -> MeetingResponse:
+        """Map-reduce: summarise chunks concurrently, reusing results for unchanged chunks."""
+        chunks = chunk_notes(notes, self.chunk_tokens)
+        keys = [hashlib.sha256(c.encode()).hexdigest() for c in chunks]
+        path = cache_path("meetings", f"{doc_id}.chunks.json")
+        cached = load_json(path, {})
+
+        async def one(chunk: str, key: str) -> MeetingResponse:
+            if key in cached:
+                return MeetingResponse(**cached[key])
+            return await self._summarise(chunk)
+
+        parts = await asyncio.gather(*(one(c, k) for c, k in zip(chunks, keys)))
+        # keep only the current revision's chunks so the file does not grow
+        save_json(path, {k: p.model_dump() for k, p in zip(keys, parts)})
+        return merge_responses(parts)
+
+    def run(self, doc_id: str, token_path: str | None = None) -> MeetingResponse:
+        return run_sync(self.arun(doc_id, token_path=token_path))
+
+    async def arun(self, doc_id: str, token_path: str | None = None) -> MeetingResponse:
+        """Summarise a doc; concurrent calls for the same doc share one fetch and summary."""
+        key = (doc_id, token_path)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._arun(doc_id, token_path))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # a cancelled caller must not cancel the summary the others are waiting for
+        return await asyncio.shield(task)
+
+    async def _arun(self, doc_id: str, token_path: str | None) -> MeetingResponse:
+        # Docs client is blocking, so fetch off the event loop
+        notes, revision_id = await asyncio.to_thread(fetch_doc, doc_id, token_path=token_path)
+        cached = self._cached(doc_id, revision_id)
+        if cached:
+            return cached
+        if count_tokens(notes) > self.chunk_tokens:
+            result = await self._summarise_chunks(doc_id, notes)
+        else:
+            result = await self._summarise(notes)
+        self._store(doc_id, revision_id, result)
+        return result
@@ -0,0 +1,109 @@
+# agents/pre_classifier.py
+from __future__ import annotations
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+# Combined confidence needed before an email skips the LLM
+THRESHOLD = float(os.getenv("PRECLASSIFY_THRESHOLD", "0.9"))
+
+BULK_SENDER_DOMAINS = (
+    "mailchimp.com", "mcsv.net", "list-manage.com", "mcdlv.net", "sendgrid.net", "sendinblue.com",
+    "klaviyomail.com", "hubspotemail.net", "exacttarget.com", "mktomail.com", "constantcontact.com",
+    "rsgsv.net", "amazonses.com",
+)
+BULK_SENDER_LOCAL = re.compile(r"^(news(letter)?s?|marketing|promo(tions?)?|offers?|deals|sales|shop)\b", re.I)
+PROMO_PHRASES = re.compile(
+    r"\d+\s?% off|\bsale\b|limited[- ]time|shop now|exclusive offer|special offer|coupon|promo code"
+    r"|free shipping|best deals?|huge savings|don'?t miss out|unsubscribe",
+    re.I,
+)
+# Mail that may need action is never short-circuited, whatever the promo signals say
+ACTION_HINTS = re.compile(
+    r"password|sign[- ]in|security|verify|verification|invoice|payment|receipt|deadline|meeting"
+    r"|docs\.google\.com/document",
+    re.I,
+)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    category: str
+    confidence: float
+    test: Callable[[dict], bool]
+
+
+def _header(em: dict, name: str) -> str:
+    return ((em.get("headers") or {}).get(name) or "").strip().lower()
+
+
+def _sender(em: dict) -> tuple:
+    match = re.search(r"<?([^<>\s@]+)@([^<>\s]+?)>?\s*$", em.get("from") or "")
+    return (match.group(1), match.group(2).lower()) if match else ("", "")
+
+
+def _bulk_domain(em: dict) -> bool:
+    domain = _sender(em)[1]
+    return any(domain == d or domain.endswith("." + d) for d in BULK_SENDER_DOMAINS)
+
+
+RULES: List[Rule] = [
+    Rule("list_unsubscribe", "PROMO", 0.7, lambda em: bool(_header(em, "list-unsubscribe"))),
+    Rule("precedence_bulk", "PROMO", 0.6, lambda em: _header(em, "precedence") in ("bulk", "list", "junk")),
+    Rule("bulk_sender_domain", "PROMO", 0.6, _bulk_domain),
+    Rule("bulk_sender_name", "PROMO", 0.5, lambda em: bool(BULK_SENDER_LOCAL.match(_sender(em)[0]))),
+    Rule(
+        "promo_phrases", "PROMO", 0.6,
+        lambda em: len({m.lower() for m in PROMO_PHRASES.findall(f"{em.get('subject', '')}\n{em.get('body', '')}")}) >= 2,
+    ),
+]
+
+
+@dataclass(frozen=True)
+class Verdict:
+    category: Optional[str]  # None means "ask the LLM"
+    confidence: float
+    rules: List[str]
+    vetoed: bool = False
+
+
+class PreClassifier:
+    """Cheap deterministic classifier that runs before the LLM.
+
+    Each matching rule contributes its confidence; they are combined as
+    independent evidence (1 - prod(1 - c)). An email is only decided here
+    when that reaches `threshold` and nothing in it hints at a required
+    action; everything else goes to the model.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None, threshold: float = THRESHOLD):
+        self.rules = RULES if rules is None else rules
+        self.threshold = threshold
+
+    def classify(self, em: dict) -> Verdict:
+        matched = [r for r in self.rules if r.test(em)]
+        scores: Dict[str, float] = {}
+        for r in matched:
+            scores[r.category] = 1 - (1 - scores.get(r.category, 0.0)) * (1 - r.confidence)
+        if not scores:
+            return Verdict(None, 0.0, [])
+        best = max(scores, key=scores.get)
+        names = [r.name for r in matched]
+        if scores[best] < self.threshold:
+            return Verdict(None, round(scores[best], 3), names)
+        if ACTION_HINTS.search(f"{em.get('subject', '')}\n{em.get('body', '')}"):
+            return Verdict(None, round(scores[best], 3), names, vetoed=True)
+        return Verdict(best, round(scores[best], 3), names)
+
+    def report(self, verdicts: List[Verdict]) -> str:
+        """One log line with the decision rate and per-rule hit rates, for tuning."""
+        seen = len(verdicts) or 1
+        decided = sum(v.category is not None for v in verdicts)
+        vetoed = sum(v.vetoed for v in verdicts)
+        rates = ", ".join(
+            f"{r.name} {sum(r.name in v.rules for v in verdicts) / seen:.0%}" for r in self.rules
+        )
+        return (f"Pre-classifier: {decided}/{len(verdicts)} emails decided without LLM "
+                f"({vetoed} vetoed); rule hits: {rates}")
@@ -25,6 +25,14 @@ class EmailResponse(BaseModel):
     category: str
     tasks: List[Task] = []
 
+
+class PackedEmailResponse(EmailResponse):
+    email_id: str = Field(..., description="email_id of the email this entry classifies")
+
+
+class PackedEmailsResponse(BaseModel):
+    emails: List[PackedEmailResponse] = Field(default_factory=list, description="Exactly one entry per email")
+
 #Meeting Agent Schemas
 class MeetingResponse(BaseModel):
     summary: str = Field(..., description="Main summary of the meeting")
@@ -64,4 +72,5 @@ class TimeBlock(BaseModel):
 class CalendarResult(BaseModel):
     events: List[CalendarEvent] = []
     proposals: List[TimeBlock] = []
+    unscheduled: List[str] = []  # ids of tasks that did not fit
     logs: List[str] = []
\ No newline at end of file
@@ -1,5 +1,6 @@
 from agents.schemas import Task
 from datetime import datetime
+from tools.task_store import deadline_bucket
 
 
 class TaskPrioritiser:
@@ -10,20 +11,10 @@ class TaskPrioritiser:
         today = datetime.today().date()
 
         for t in tasks:
-            priority = "LOW"
-
-            if t.due_date:
-                try:
-                    due = datetime.strptime(t.due_date, "%Y-%m-%d").date()
-                    if due <= today:
-                        priority = "HIGH"
-                    elif (due - today).days <= 2:
-                        priority = "HIGH"
-                    else:
-                        priority = "MED"
-                except Exception:
-                    pass
-            elif any(v in t.title.lower() for v in ["review", "check", "look at"]):
+            # "due" covers overdue and due within DUE_SOON_DAYS; unparseable dates stay LOW
+            bucket = deadline_bucket(t.due_date, today)
+            priority = {"due": "HIGH", "later": "MED"}.get(bucket, "LOW")
+            if bucket == "none" and any(v in t.title.lower() for v in ["review", "check", "look at"]):
                 priority = "MED"
 
             updated_task = t.model_copy(update={"priority": priority})
@@ -1,8 +1,169 @@
 # app.py
+import os
+import time
+
 import streamlit as st
 
+from agents.schemas import CalendarEvent, TimeBlock
+
+# A finished run is shown again for this long unless the user refreshes
+RESULTS_TTL_S = int(os.getenv("APP_RESULTS_TTL_S", "600"))
+
 st.set_page_config(page_title="Multi-Agent Productivity Assistant", layout="wide")
+
+
+@st.cache_resource
+def load_graph():
+    """Compiled graph; its agents and LLM clients are built once per server process."""
+    from orchestration.graph import get_app
+
+    return get_app()
+
+
+@st.cache_resource
+def results_cache() -> dict:
+    """Finished runs keyed by (mailbox, email limit), shared across sessions."""
+    return {}
+
+
+def render_summary(s) -> None:
+    st.markdown(f"**[{s.category}] {s.subject}**  \n{s.text}")
+
+
+def render_tasks(tasks, provisional: bool = False) -> None:
+    if provisional:
+        st.caption(f"{len(tasks)} tasks extracted so far - prioritising when all emails are done")
+        for t in tasks:
+            st.markdown(f"- {t.title}")
+        return
+    for level in ["HIGH", "MED", "LOW"]:
+        group = [t for t in tasks if (t.priority or "LOW") == level]
+        if group:
+            st.markdown(f"**{level}**")
+            for t in group:
+                tag = "meeting" if t.source == "meeting" else "email"
+                due = f" - due {t.due_date}" if t.due_date else ""
+                st.markdown(f"- {t.title} _({tag}{due})_")
+
+
+def render_calendar(calendar) -> None:
+    if not calendar:
+        return
+    st.markdown("**Upcoming events**")
+    for e in calendar.get("events", []):
+        st.markdown(f"- {CalendarEvent(**e).convert_readable()}")
+    st.markdown("**Proposed time blocks**")
+    for b in calendar.get("proposals", []):
+        st.markdown(f"- {TimeBlock(**b).convert_readable()}")
+    if calendar.get("unscheduled"):
+        st.warning(f"{len(calendar['unscheduled'])} tasks did not fit in the calendar.")
+
+
+def stream_run(email_limit: int, summaries_box, tasks_slot, calendar_slot) -> dict:
+    """Run the graph, rendering each result as it arrives; returns the finished run."""
+    from orchestration.checkpoint import finish_run, prepare_run, release_run
+
+    graph = load_graph()
+    # an interrupted run (e.g. the browser tab was closed) is resumed, not restarted
+    inputs, config = prepare_run(graph, {"email_limit": email_limit, "summaries": [], "tasks": [], "logs": []})
+    run = {"summaries": [], "tasks": [], "logs": [], "calendar": None}
+    extracted, done, shown, finished = [], 0, 0, set()
+
+    try:
+        with st.status("Fetching emails...", expanded=False) as status:
+            # "custom" chunks are per-email results from the emails node, "updates" are finished nodes
+            for mode, chunk in graph.stream(inputs, config, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    done += 1
+                    status.update(label=f"Classified {done} emails...")
+                    for s in chunk["summaries"]:
+                        with summaries_box:
+                            render_summary(s)
+                    shown += len(chunk["summaries"])
+                    if chunk["tasks"]:
+                        extracted.extend(chunk["tasks"])
+                        with tasks_slot.container():
+                            render_tasks(extracted, provisional=True)
+                    continue
+
+                for node, update in chunk.items():
+                    update = update or {}
+                    finished.add(node)
+                    run["logs"].extend(update.get("logs", []))
+                    status.write(f"Finished {node}")
+                    if node == "emails":
+                        run["summaries"] = update.get("summaries", [])
+                    elif node == "prioritise":
+                        run["tasks"] = update.get("tasks", [])
+                        with tasks_slot.container():
+                            render_tasks(run["tasks"])
+                    elif node == "calendar":
+                        run["calendar"] = update.get("calendar")
+                        with calendar_slot.container():
+                            render_calendar(run["calendar"])
+            status.update(label="Done", state="complete")
+        if graph.checkpointer is not None:
+            # a resumed run only streams the nodes it re-ran; the rest comes from the checkpoint
+            final = graph.get_state(config).values
+            run.update({k: final.get(k, run[k]) for k in ("summaries", "tasks", "logs", "calendar")})
+    except BaseException:
+        # also a rerun or closed session (Streamlit stops the script with an exception)
+        release_run(config)
+        raise
+    finish_run(graph, config)
+
+    # a run resumed past a node streams nothing for it, so render it from the final state
+    if not shown:
+        with summaries_box:
+            for s in run["summaries"]:
+                render_summary(s)
+    if "prioritise" not in finished:
+        with tasks_slot.container():
+            render_tasks(run["tasks"])
+    if "calendar" not in finished:
+        with calendar_slot.container():
+            render_calendar(run["calendar"])
+
+    run["at"] = time.time()
+    return run
+
+
 st.title("Multi-Agent Productivity Assistant")
-st.caption("Milestone M0: environment and skeleteon ready.")
-st.success("Setup complete! You can now run the app with `streamlit run app.py`.")
 
+with st.sidebar:
+    email_limit = int(st.number_input("Emails to process", min_value=1, max_value=200, value=10))
+    refresh = st.button("Refresh")
+
+key = (os.getenv("EMAIL_USER") or "default", email_limit)
+cached = results_cache().get(key)
+
+left, right = st.columns(2)
+with left:
+    st.subheader("Summaries")
+    summaries_box = st.container()
+with right:
+    st.subheader("Tasks")
+    tasks_slot = st.empty()
+    st.subheader("Calendar")
+    calendar_slot = st.empty()
+
+if cached and not refresh and time.time() - cached["at"] < RESULTS_TTL_S:
+    st.caption(f"Results from {int((time.time() - cached['at']) // 60)} min ago - press Refresh to run again.")
+    with summaries_box:
+        for s in cached["summaries"]:
+            render_summary(s)
+    with tasks_slot.container():
+        render_tasks(cached["tasks"])
+    with calendar_slot.container():
+        render_calendar(cached["calendar"])
+    run = cached
+else:
+    try:
+        run = stream_run(email_limit, summaries_box, tasks_slot, calendar_slot)
+        results_cache()[key] = run
+    except Exception as e:
+        st.error(f"Pipeline failed - {e}")
+        run = {"logs": []}
+
+with st.expander("Logs"):
+    st.text("\n".join(run["logs"]))
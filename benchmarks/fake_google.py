@@ -0,0 +1,69 @@
+# benchmarks/fake_google.py
+"""HttpMock-style transport serving canned Calendar and Docs responses."""
+from __future__ import annotations
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+from googleapiclient.discovery import build
+
+
+def synthetic_events(count: int, days: int = 21) -> List[dict]:
+    """Working-hour meetings spread over the next `days` days."""
+    start = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+    events = []
+    for i in range(count):
+        s = start + timedelta(days=i % days, minutes=30 * ((i * 7) % 16))
+        events.append({
+            "id": f"ev{i}",
+            "status": "confirmed",
+            "summary": f"Meeting {i}",
+            "start": {"dateTime": s.isoformat()},
+            "end": {"dateTime": (s + timedelta(minutes=30 + 15 * (i % 3))).isoformat()},
+        })
+    return events
+
+
+def synthetic_doc(paragraphs: int = 60, revision: str = "rev-1") -> dict:
+    content = []
+    for i in range(paragraphs):
+        text = f"Item {i}: Kavya to update section {i} of the report by Friday.\n" if i % 6 == 0 else f"Discussion point {i} about formatting and references.\n"
+        content.append({"paragraph": {"elements": [{"textRun": {"content": text}}]}})
+    return {"documentId": "bench-doc-1", "revisionId": revision, "body": {"content": content}}
+
+
+class RouteHttp:
+    """Stand-in for httplib2.Http that answers by URL path, with optional latency."""
+
+    def __init__(self, events: List[dict], doc: dict, latency_ms: float = 0.0):
+        self.events = events
+        self.doc = doc
+        self.latency_s = latency_ms / 1000
+        self.requests = 0
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=1, connection_type=None):
+        self.requests += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        url = urlparse(uri)
+        query = parse_qs(url.query)
+        if "/calendar/v3/calendars/" in url.path:
+            payload = {"items": self.events, "nextSyncToken": "sync-1"}
+            if "syncToken" in query:
+                payload = {"items": [], "nextSyncToken": "sync-1"}
+        elif "/v1/documents/" in url.path:
+            fields = query.get("fields", [""])[0]
+            payload = {"revisionId": self.doc["revisionId"]} if fields == "revisionId" else self.doc
+        else:
+            return httplib2.Response({"status": "404"}), b"{}"
+        return httplib2.Response({"status": "200"}), json.dumps(payload).encode()
+
+
+def build_services(http: RouteHttp):
+    """Return (calendar, docs) clients wired to the fake transport."""
+    calendar = build("calendar", "v3", http=http, static_discovery=True, cache_discovery=False)
+    docs = build("docs", "v1", http=http, static_discovery=True, cache_discovery=False)
+    return calendar, docs
@@ -0,0 +1,203 @@
+# benchmarks/fake_imap.py
+"""Minimal in-process IMAP4rev1 server backed by a synthetic mailbox.
+
+Implements just what tools.gmail_provider uses: LOGIN, SELECT, STATUS,
+UID SEARCH (including `UID n:*`), UID FETCH with BODYSTRUCTURE, header
+fields and partial body sections, and LOGOUT. X-GM-RAW is accepted and
+ignored.
+"""
+from __future__ import annotations
+import email
+import random
+import re
+import socketserver
+import threading
+import time
+from email.message import EmailMessage, Message
+from typing import Dict, List, Optional
+
+
+def _q(value) -> bytes:
+    if value is None:
+        return b"NIL"
+    if isinstance(value, str):
+        value = value.encode()
+    return b'"' + value.replace(b"\\", b"\\\\").replace(b'"', b'\\"') + b'"'
+
+
+def _raw_payload(part: Message) -> bytes:
+    payload = part.get_payload(decode=False)
+    return payload.encode("utf-8", errors="surrogateescape") if isinstance(payload, str) else b""
+
+
+def bodystructure(part: Message) -> bytes:
+    """Render a BODYSTRUCTURE for an email.message.Message."""
+    if part.is_multipart():
+        children = b"".join(bodystructure(p) for p in part.get_payload())
+        return b"(" + children + b" " + _q(part.get_content_subtype().upper()) + b")"
+    raw = _raw_payload(part)
+    params = (part.get_params() or [])[1:]
+    plist = b"(" + b" ".join(_q(k.upper()) + b" " + _q(v) for k, v in params) + b")" if params else b"NIL"
+    encoding = (part.get("Content-Transfer-Encoding") or "7bit").upper()
+    disposition = part.get_content_disposition()
+    disp = b"(" + _q(disposition.upper()) + b" NIL)" if disposition else b"NIL"
+    fields = [
+        _q(part.get_content_maintype().upper()), _q(part.get_content_subtype().upper()),
+        plist, b"NIL", b"NIL", _q(encoding), str(len(raw)).encode(),
+    ]
+    if part.get_content_maintype() == "text":
+        fields.append(str(raw.count(b"\n")).encode())
+    fields += [b"NIL", disp, b"NIL"]
+    return b"(" + b" ".join(fields) + b")"
+
+
+def _section(msg: Message, section: str) -> bytes:
+    part = msg
+    for n in section.split("."):
+        if part.is_multipart():
+            part = part.get_payload()[int(n) - 1]
+        elif n != "1":
+            return b""
+    return _raw_payload(part)
+
+
+class Mailbox:
+    """UID-addressed message store plus wire counters for the benchmark."""
+
+    def __init__(self, messages: List[bytes], uidvalidity: int = 1, rtt_ms: float = 0.0):
+        self.messages: Dict[int, bytes] = {i + 1: m for i, m in enumerate(messages)}
+        self.uidvalidity = uidvalidity
+        self.rtt_s = rtt_ms / 1000
+        self.bytes_sent = 0
+        self.commands = 0
+        self._parsed: Dict[int, Message] = {}
+
+    def parsed(self, uid: int) -> Message:
+        if uid not in self._parsed:
+            self._parsed[uid] = email.message_from_bytes(self.messages[uid])
+        return self._parsed[uid]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _send(self, data: bytes) -> None:
+        self.server.mailbox.bytes_sent += len(data)
+        self.wfile.write(data)
+
+    def handle(self):
+        mb: Mailbox = self.server.mailbox
+        self._send(b"* OK [CAPABILITY IMAP4rev1] fake server ready\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode().rstrip("\r\n").partition(" ")
+            cmd, _, arg = rest.partition(" ")
+            cmd = cmd.upper()
+            mb.commands += 1
+            if mb.rtt_s:
+                time.sleep(mb.rtt_s)
+
+            if cmd == "CAPABILITY":
+                self._send(b"* CAPABILITY IMAP4rev1\r\n")
+            elif cmd == "SELECT":
+                self._send(f"* {len(mb.messages)} EXISTS\r\n* OK [UIDVALIDITY {mb.uidvalidity}] UIDs valid\r\n".encode())
+            elif cmd == "STATUS":
+                self._send(f"* STATUS inbox (UIDVALIDITY {mb.uidvalidity})\r\n".encode())
+            elif cmd == "LOGOUT":
+                self._send(b"* BYE logging out\r\n" + f"{tag} OK LOGOUT completed\r\n".encode())
+                return
+            elif cmd == "UID":
+                sub, _, args = arg.partition(" ")
+                if sub.upper() == "SEARCH":
+                    self._search(mb, args)
+                else:
+                    self._fetch(mb, args)
+            self._send(f"{tag} OK {cmd} completed\r\n".encode())
+
+    def _search(self, mb: Mailbox, args: str) -> None:
+        uids = sorted(mb.messages)
+        m = re.search(r"UID (\d+):\*", args)
+        if m:
+            # like real servers, n:* matches the newest message even below n
+            uids = [u for u in uids if u >= int(m.group(1))] or uids[-1:]
+        self._send(b"* SEARCH " + " ".join(map(str, uids)).encode() + b"\r\n")
+
+    def _fetch(self, mb: Mailbox, args: str) -> None:
+        uid_set, _, items = args.partition(" ")
+        for uid in (int(u) for u in uid_set.split(",")):
+            if uid not in mb.messages:
+                continue
+            msg = mb.parsed(uid)
+            out = f"* {uid} FETCH (UID {uid}".encode()
+            if "BODYSTRUCTURE" in items:
+                out += b" BODYSTRUCTURE " + bodystructure(msg)
+            header = re.search(r"BODY\.PEEK\[HEADER\.FIELDS \(([^)]*)\)\]", items)
+            if header:
+                wanted = header.group(1).upper().split()
+                data = b"".join(f"{k}: {v}\r\n".encode() for k, v in msg.items() if k.upper() in wanted) + b"\r\n"
+                out += f" BODY[HEADER.FIELDS ({header.group(1)})] {{{len(data)}}}\r\n".encode() + data
+            for part in re.finditer(r"BODY\.PEEK\[([\d.]+)\](?:<(\d+)\.(\d+)>)?", items):
+                data, key = _section(msg, part.group(1)), f"BODY[{part.group(1)}]"
+                if part.group(2):
+                    start = int(part.group(2))
+                    data, key = data[start:start + int(part.group(3))], f"{key}<{start}>"
+                out += f" {key} {{{len(data)}}}\r\n".encode() + data
+            self._send(out + b")\r\n")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(mailbox: Mailbox) -> _Server:
+    """Start the server on a free localhost port in a daemon thread."""
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.mailbox = mailbox
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---- Synthetic mailbox ----
+
+_PROJECT = [
+    "Hi Kavya,\n\nCould you review the draft slides for the pitch deck and send feedback by tomorrow?\n\nThanks,\nAlex",
+    "Hello,\n\nPlease upload your ID on the verification portal within 5 days.\n\nRegards,\nAdmin team",
+    "Hi,\n\nCan you finish the budget section of the report before Friday?\n\nCheers",
+]
+_ALERT = "Suspicious sign-in detected on your account. Reset your password immediately."
+_NEWSLETTER = "<html><body>" + "<p>Huge savings this week only! 50% off everything.</p>" * 40 + "<a href='https://shop.example/unsub'>Unsubscribe</a></body></html>"
+
+
+def synthetic_mailbox(size: int, seed: int = 42, doc_id: Optional[str] = "bench-doc-1") -> List[bytes]:
+    """Build a reproducible inbox mixing promos, project mail, alerts, threads and meeting notes."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(size):
+        msg = EmailMessage()
+        msg["From"] = f"sender{i % 17}@example.com"
+        msg["To"] = "kavya@example.com"
+        kind = rng.choices(["promo", "project", "alert", "thread", "meeting"], [45, 30, 8, 12, 5])[0]
+        if kind == "promo":
+            msg["Subject"] = f"Special Offer #{i} – 50% off!"
+            msg["List-Unsubscribe"] = "<https://shop.example/unsub>"
+            msg["Precedence"] = "bulk"
+            msg.set_content("Huge savings this week only.")
+            msg.add_alternative(_NEWSLETTER, subtype="html")
+        elif kind == "alert":
+            msg["Subject"] = "Security Alert – Password reset required"
+            msg.set_content(_ALERT)
+        elif kind == "meeting" and doc_id:
+            msg["Subject"] = f"Fwd: Notes: Weekly Team Meeting {i}"
+            msg.set_content(f"---------- Forwarded message ---------\nNotes: https://docs.google.com/document/d/{doc_id}/edit\n")
+        else:
+            body = rng.choice(_PROJECT)
+            if kind == "thread":
+                quoted = "\n".join("> " + line for line in (body + "\n") * 30)
+                body = f"Sounds good, will do.\n\nOn Mon, 1 Sep 2025 at 10:00, Alex <alex@example.com> wrote:\n{quoted}"
+            msg["Subject"] = f"Project update {i}"
+            msg.set_content(body)
+            if rng.random() < 0.2:
+                msg.add_attachment(rng.randbytes(256 * 1024), maintype="application", subtype="pdf", filename="report.pdf")
+        messages.append(msg.as_bytes())
+    return messages
@@ -0,0 +1,109 @@
+# benchmarks/fake_llm.py
+"""Deterministic chat model with configurable latency for offline runs."""
+from __future__ import annotations
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Request bucket shared by every instance, as a real API key's quota is
+_quota = {"level": None, "stamp": 0.0}
+_quota_lock = threading.Lock()
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers the repo's email and meeting prompts with valid JSON.
+
+    Each call sleeps `latency_ms` (+/- `jitter_ms`) to stand in for a
+    network round trip, and reports token usage estimated from text length.
+    With `rpm_quota` set, requests beyond a continuously refilled
+    per-minute quota fail with a 429 and responses carry OpenAI-style
+    `x-ratelimit-*` headers.
+    """
+
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    seed: int = 0
+    rpm_quota: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bench"
+
+    def _delay(self) -> float:
+        rng = random.Random(time.perf_counter_ns() ^ self.seed)
+        return max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def _admit(self) -> Dict[str, str]:
+        if not self.rpm_quota:
+            return {}
+        with _quota_lock:
+            now = time.monotonic()
+            level = self.rpm_quota if _quota["level"] is None else _quota["level"]
+            level = min(self.rpm_quota, level + (now - _quota["stamp"]) * self.rpm_quota / 60)
+            _quota["stamp"] = now
+            wait_s = (1 - level) * 60 / self.rpm_quota
+            if level < 1:
+                _quota["level"] = level
+                raise openai.RateLimitError(
+                    "Rate limit reached for requests",
+                    response=httpx.Response(
+                        429,
+                        headers={"retry-after-ms": str(int(wait_s * 1000))},
+                        request=httpx.Request("POST", "https://fake.invalid/v1/chat/completions"),
+                    ),
+                    body=None,
+                )
+            _quota["level"] = level - 1
+            return {
+                "x-ratelimit-limit-requests": str(int(self.rpm_quota)),
+                "x-ratelimit-remaining-requests": str(int(level - 1)),
+                "x-ratelimit-reset-requests": f"{max(0.0, (self.rpm_quota - level + 1) * 60 / self.rpm_quota):.3f}s",
+            }
+
+    @staticmethod
+    def _email_reply(text: str) -> dict:
+        lowered = text.lower()
+        if "% off" in lowered or "offer" in lowered or "unsubscribe" in lowered:
+            return {"summary": "", "category": "PROMO", "tasks": []}
+        if "password" in lowered:
+            return {"summary": "Security alert.", "category": "ALERT",
+                    "tasks": [{"title": "Reset your password", "due_raw": None, "confidence": 0.9}]}
+        due = re.search(r"(by tomorrow|before friday|by friday|within \d+ days)", lowered)
+        return {"summary": "Action requested.", "category": "PROJECT",
+                "tasks": [{"title": "Follow up on request", "due_raw": due.group(1) if due else None, "confidence": 0.8}]}
+
+    def _reply(self, messages: List[BaseMessage], headers: Dict[str, str]) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        if "MEETING NOTES" in prompt:
+            owners = re.findall(r"Kavya to ([^\n.]+)", prompt)
+            payload = {"summary": "Weekly sync.", "discussion_points": ["Formatting"],
+                       "tasks": [{"title": o.strip().capitalize(), "due_raw": "by Friday", "priority": "MED"} for o in owners]}
+        elif "EMAILS:" in prompt:
+            blocks = re.split(r"=== email_id: (\S+) ===", prompt.split("EMAILS:", 1)[-1])[1:]
+            payload = {"emails": [{"email_id": eid, **self._email_reply(text)} for eid, text in zip(blocks[::2], blocks[1::2])]}
+        else:
+            payload = self._email_reply(prompt.split("EMAIL:", 1)[-1])
+        content = json.dumps(payload)
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4,
+                 "total_tokens": (len(prompt) + len(content)) // 4}
+        return AIMessage(content=content, usage_metadata=usage, response_metadata={"headers": headers} if headers else {})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        headers = self._admit()
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, headers))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        headers = self._admit()
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, headers))])
@@ -0,0 +1,179 @@
+# benchmarks/run_bench.py
+"""Offline pipeline benchmark.
+
+Drives `orchestration.graph.app` against local stand-ins (in-process IMAP
+server, fake Calendar/Docs transport, fake chat model) at several inbox
+sizes and reports per-stage latency percentiles and throughput. Each size
+runs in a fresh subprocess with its own cache directory, so results are
+cold-start and comparable between commits.
+
+    python -m benchmarks.run_bench --sizes 10 50 200
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+RESULTS_PATH = "bench_results.jsonl"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _stage_stats(spans: List[dict]) -> Dict[str, dict]:
+    grouped: Dict[str, List[float]] = {}
+    for s in spans:
+        grouped.setdefault(f"{s['kind']}:{s['name']}", []).append(s["duration_ms"])
+    return {
+        key: {
+            "count": len(vals),
+            "p50_ms": round(_percentile(vals, 50), 2),
+            "p95_ms": round(_percentile(vals, 95), 2),
+            "max_ms": round(max(vals), 2),
+        }
+        for key, vals in grouped.items()
+    }
+
+
+def run_worker(args: argparse.Namespace) -> dict:
+    """Run the pipeline in this process against the stand-ins and return metrics."""
+    from benchmarks.fake_imap import Mailbox, serve, synthetic_mailbox
+
+    mailbox = Mailbox(synthetic_mailbox(args.size, seed=args.seed), rtt_ms=args.imap_rtt_ms)
+    server = serve(mailbox)
+    os.environ.update(
+        ASSISTANT_CACHE_DIR=tempfile.mkdtemp(prefix="bench-cache-"),
+        EMAIL_USER="bench@example.com",
+        EMAIL_PASS="bench",
+        IMAP_HOST="127.0.0.1",
+        IMAP_PORT=str(server.server_address[1]),
+        IMAP_SSL="0",
+        LLM_CACHE="on" if args.llm_cache else "off",
+    )
+
+    import_start = time.perf_counter()
+    from benchmarks.fake_google import RouteHttp, build_services, synthetic_doc, synthetic_events
+    from benchmarks.fake_llm import FakeChatModel
+    from tools.llm import set_llm_factory
+
+    set_llm_factory(lambda **kw: FakeChatModel(
+        latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, rpm_quota=args.llm_rpm_quota, **kw
+    ))
+    http = RouteHttp(synthetic_events(args.events), synthetic_doc(), latency_ms=args.google_latency_ms)
+    calendar_service, docs_service = build_services(http)
+
+    import tools.calendar_provider as calendar_provider
+    import tools.docs_provider as docs_provider
+    calendar_provider.get_calendar_service = lambda token_path=None: calendar_service
+    docs_provider.get_docs_service = lambda token_path=None: docs_service
+
+    from orchestration.checkpoint import run_pipeline
+    from tools.tracing import get_spans, start_run
+    import_s = time.perf_counter() - import_start
+
+    runs = []
+    for _ in range(args.repeat):
+        start_run()
+        start = time.perf_counter()
+        result = run_pipeline({"email_limit": args.size, "summaries": [], "tasks": [], "logs": []})
+        wall_s = time.perf_counter() - start
+        spans = get_spans()
+        runs.append({
+            "wall_s": round(wall_s, 3),
+            "emails_per_s": round(args.size / wall_s, 2) if wall_s else 0.0,
+            "llm_calls": sum(1 for s in spans if s["kind"] == "llm" and not s.get("cache_hit")),
+            "prompt_tokens": sum(s.get("prompt_tokens", 0) for s in spans),
+            "tasks": len(result.get("tasks", [])),
+            "errors": sum(1 for l in result.get("logs", []) if l.startswith("ERROR")),
+            "throttled": sum(1 for s in spans if s["kind"] == "llm" and s["status"] != "ok"),
+            "stages": _stage_stats(spans),
+        })
+
+    server.shutdown()
+    return {
+        "size": args.size,
+        "import_s": round(import_s, 3),
+        "imap_commands": mailbox.commands,
+        "imap_bytes": mailbox.bytes_sent,
+        "google_requests": http.requests,
+        "runs": runs,
+    }
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _print_report(result: dict) -> None:
+    for i, run in enumerate(result["runs"], start=1):
+        print(f"\n=== inbox={result['size']} run {i}: {run['wall_s']:.2f}s, {run['emails_per_s']} emails/s, "
+              f"{run['llm_calls']} LLM calls, {run['throttled']} throttled, {run['prompt_tokens']} prompt tokens, "
+              f"{run['errors']} errors ===")
+        print(f"{'stage':<34}{'count':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for key, st in sorted(run["stages"].items(), key=lambda kv: -kv[1]["max_ms"]):
+            print(f"{key:<34}{st['count']:>6}{st['p50_ms']:>10.1f}{st['p95_ms']:>10.1f}{st['max_ms']:>10.1f}")
+    print(f"(import {result['import_s']:.2f}s | IMAP {result['imap_commands']} commands, "
+          f"{result['imap_bytes'] / 1024:.0f} KiB | Google {result['google_requests']} requests)")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=1, help="pipeline runs per size (later runs are warm)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-rpm-quota", type=float, default=0.0, help="emulate an API request quota (429s above it)")
+    parser.add_argument("--imap-rtt-ms", type=float, default=20.0)
+    parser.add_argument("--google-latency-ms", type=float, default=50.0)
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-cache", action="store_true", help="enable the on-disk LLM cache")
+    parser.add_argument("--out", default=RESULTS_PATH, help="JSONL file the results are appended to")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args)))
+        return
+
+    passthrough = [
+        "--repeat", str(args.repeat), "--llm-latency-ms", str(args.llm_latency_ms),
+        "--llm-jitter-ms", str(args.llm_jitter_ms), "--llm-rpm-quota", str(args.llm_rpm_quota), "--imap-rtt-ms", str(args.imap_rtt_ms),
+        "--google-latency-ms", str(args.google_latency_ms), "--events", str(args.events),
+        "--seed", str(args.seed),
+    ] + (["--llm-cache"] if args.llm_cache else [])
+
+    stamp = {"at": datetime.now().isoformat(timespec="seconds"), "git": _git_rev()}
+    for size in args.sizes:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run_bench", "--worker", "--size", str(size), *passthrough],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"inbox={size}: worker failed\n{proc.stderr}", file=sys.stderr)
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        _print_report(result)
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**stamp, **result}) + "\n")
+
+    print(f"\n(Results appended to {args.out})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# orchestration/batch.py
+"""Run the assistant for many mailboxes in parallel.
+
+    python -m orchestration.batch accounts.json --workers 8 --mode process --llm-rpm 500
+
+`accounts.json` is a list of account configs:
+
+    [{"name": "kavya", "email_user": "kavya@example.com", "email_pass_env": "KAVYA_PASS",
+      "calendar_token": "secrets/kavya_token.json", "docs_token": "secrets/kavya_docs.json"}]
+
+Each account runs its own pipeline; results are written to
+`<out>/<name>/result.json`. All workers share one LLM request budget.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+
+def load_accounts(path: str) -> List[dict]:
+    """Read account configs, resolving `email_pass_env` to the password it names."""
+    with open(path, encoding="utf-8") as f:
+        accounts = json.load(f)
+    for acc in accounts:
+        if "name" not in acc:
+            raise ValueError(f"Account config is missing 'name': {acc}")
+        if not acc.get("email_pass") and acc.get("email_pass_env"):
+            acc["email_pass"] = os.getenv(acc["email_pass_env"])
+    return accounts
+
+
+def _init_worker(llm_rpm: Optional[float]) -> None:
+    # Runs in each worker process before the graph (and its LLM clients) is imported
+    if llm_rpm:
+        os.environ["LLM_RPM"] = str(llm_rpm)
+
+
+def run_account(account: dict, out_dir: str, email_limit: int = 5) -> dict:
+    """Run one pipeline for an account and write its result file."""
+    from orchestration.checkpoint import run_pipeline  # imported lazily so worker env is in place
+
+    name = account["name"]
+    start = time.perf_counter()
+    try:
+        result = run_pipeline({
+            "account": account,
+            "email_limit": email_limit,
+            "summaries": [],
+            "tasks": [],
+            "logs": [],
+        })
+    except Exception as e:
+        return {"name": name, "ok": False, "error": str(e), "seconds": round(time.perf_counter() - start, 2)}
+
+    target = os.path.join(out_dir, re.sub(r"[^\w.@-]", "_", name))
+    os.makedirs(target, exist_ok=True)
+    with open(os.path.join(target, "result.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "summaries": [s.model_dump() for s in result.get("summaries", [])],
+            "tasks": [t.model_dump() for t in result.get("tasks", [])],
+            "calendar": result.get("calendar"),
+            "logs": result.get("logs", []),
+        }, f, indent=2, default=str)
+
+    return {
+        "name": name,
+        "ok": True,
+        "summaries": len(result.get("summaries", [])),
+        "tasks": len(result.get("tasks", [])),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def run_batch(
+    accounts: List[dict],
+    workers: int = 4,
+    mode: str = "thread",
+    out_dir: str = "runs",
+    email_limit: int = 5,
+    llm_rpm: Optional[float] = None,
+) -> List[dict]:
+    """Run every account across a thread or process pool; returns per-account status in input order.
+
+    Threads share one in-process rate limiter. Processes cannot share it,
+    so each gets an equal slice of `llm_rpm`, which keeps the total within
+    the same budget.
+    """
+    if mode == "process":
+        share = llm_rpm / workers if llm_rpm else None
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(share,))
+    else:
+        _init_worker(llm_rpm)
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    with pool:
+        futures = [pool.submit(run_account, acc, out_dir, email_limit) for acc in accounts]
+        results = []
+        for acc, fut in zip(accounts, futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append({"name": acc["name"], "ok": False, "error": str(e)})
+    return results
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accounts", help="JSON file with a list of account configs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--mode", choices=["thread", "process"], default="process")
+    parser.add_argument("--out", default="runs")
+    parser.add_argument("--email-limit", type=int, default=5)
+    parser.add_argument("--llm-rpm", type=float, default=None, help="global LLM requests per minute")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = run_batch(load_accounts(args.accounts), args.workers, args.mode, args.out, args.email_limit, args.llm_rpm)
+    for r in results:
+        status = f"{r.get('tasks', 0)} tasks in {r.get('seconds', 0)}s" if r["ok"] else f"ERROR: {r.get('error')}"
+        print(f"- {r['name']}: {status}")
+    ok = sum(r["ok"] for r in results)
+    print(f"\n{ok}/{len(results)} accounts processed in {time.perf_counter() - start:.1f}s (results in {args.out}/)")
+
+
+if __name__ == "__main__":
+    main()
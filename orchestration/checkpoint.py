@@ -0,0 +1,141 @@
+# orchestration/checkpoint.py
+"""Durable, resumable pipeline runs.
+
+With `langgraph-checkpoint-sqlite` installed the graph is compiled with a
+SQLite checkpointer, so a run that failed in one node resumes from that node
+instead of starting over. Independently, the emails node saves each email's
+result under the run id (tools/progress.py), so a run that died halfway
+through the inbox skips the emails it already classified. Meeting docs are
+reused through the summariser's revision and chunk caches.
+"""
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import uuid
+import warnings
+from typing import Dict, Optional, Tuple
+
+from tools.local_store import cache_path
+from tools.progress import LEASE_S, get_progress_store
+
+# Kept out of the state (and so out of checkpoints); nodes get them from the run config
+SECRET_KEYS = ("email_pass",)
+# State types the checkpointer may rebuild when a run is resumed
+STATE_TYPES = [("agents.schemas", name) for name in ("Summary", "Task", "CalendarEvent", "TimeBlock", "CalendarResult")]
+# Runs this process is executing; each renews its lease until finished or released
+_leases: Dict[str, threading.Event] = {}
+
+
+def checkpoints_enabled() -> bool:
+    return os.getenv("CHECKPOINTS", "on").lower() not in ("off", "0", "false")
+
+
+def get_checkpointer():
+    """SQLite checkpointer in the cache directory, or None if disabled or not installed."""
+    if not checkpoints_enabled():
+        return None
+    try:
+        from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        warnings.warn("langgraph-checkpoint-sqlite is not installed; failed runs will restart their nodes instead of resuming")
+        return None
+    try:
+        serde = JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES)
+    except TypeError:  # older langgraph-checkpoint without an allowlist
+        serde = JsonPlusSerializer()
+    return SqliteSaver(sqlite3.connect(cache_path("checkpoints.sqlite"), check_same_thread=False), serde=serde)
+
+
+def run_secrets(config: dict) -> dict:
+    return (config.get("configurable") or {}).get("secrets") or {}
+
+
+def prepare_run(app, state: dict, key: Optional[str] = None) -> Tuple[Optional[dict], dict]:
+    """Input and config for the next run for `key` (by default the account's mailbox).
+
+    If the last run for `key` did not finish and nobody holds its lease, its
+    run id is reused: the input is None when the checkpointer can continue
+    from the failed node, otherwise the graph starts again and the emails node
+    reuses saved results. A run still in progress elsewhere (another session
+    or process) is left alone and a new run is started. The caller must end
+    the run with finish_run, or release_run if it fails.
+    """
+    account = dict(state.get("account") or {})
+    secrets = {k: account.pop(k) for k in SECRET_KEYS if k in account}
+    if "account" in state:
+        state = {**state, "account": account}
+    key = key or account.get("name") or account.get("email_user") or os.getenv("EMAIL_USER") or "default"
+
+    store = get_progress_store()
+    run_id = store.claim_unfinished_run(key) if checkpoints_enabled() else None
+    # secrets go in a dict: checkpoint metadata copies plain configurable values, not dicts
+    config = {"configurable": {"thread_id": run_id, "secrets": secrets}}
+    if run_id and app.checkpointer is not None:
+        snapshot = app.get_state(config)
+        if snapshot.next:
+            _hold_lease(run_id)
+            return None, config
+        if snapshot.values:
+            # finished, but the process died before recording it
+            finish_run(app, config)
+            run_id = None
+    if not run_id:
+        run_id = f"{key}-{uuid.uuid4().hex[:8]}"
+        store.start_run(key, run_id)
+        config["configurable"]["thread_id"] = run_id
+    _hold_lease(run_id)
+    return state, config
+
+
+def _hold_lease(run_id: str) -> None:
+    """Renew the run's lease in the background so other sessions do not resume it."""
+    stop = _leases[run_id] = threading.Event()
+    store = get_progress_store()
+
+    def renew() -> None:
+        while not stop.wait(LEASE_S / 3):
+            try:
+                store.renew_lease(run_id)
+            except sqlite3.Error:
+                pass  # retried on the next tick, well within the lease
+
+    threading.Thread(target=renew, name=f"lease-{run_id}", daemon=True).start()
+
+
+def _drop_lease(run_id: str) -> None:
+    stop = _leases.pop(run_id, None)
+    if stop:
+        stop.set()
+
+
+def release_run(config: dict) -> None:
+    """Stop holding a failed run, so the next call for its key resumes it."""
+    run_id = config["configurable"]["thread_id"]
+    _drop_lease(run_id)
+    get_progress_store().release_run(run_id)
+
+
+def finish_run(app, config: dict) -> None:
+    """Forget a completed run's checkpoints and saved email results."""
+    run_id = config["configurable"]["thread_id"]
+    _drop_lease(run_id)
+    get_progress_store().finish_run(run_id)
+    if app.checkpointer is not None:
+        app.checkpointer.delete_thread(run_id)
+
+
+def run_pipeline(state: dict, key: Optional[str] = None) -> dict:
+    """Invoke the graph, resuming the last run for `key` if it was interrupted."""
+    from orchestration.graph import get_app
+
+    app = get_app()
+    inputs, config = prepare_run(app, state, key)
+    try:
+        result = app.invoke(inputs, config)
+    except BaseException:
+        release_run(config)
+        raise
+    finish_run(app, config)
+    return result
@@ -1,41 +1,99 @@
 # orchestration/graph.py
-from langgraph.graph import StateGraph, END
+import functools
+import os
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+from langgraph.graph import StateGraph, START, END
+from orchestration.checkpoint import get_checkpointer, run_secrets
 from orchestration.state import WorkflowState
-from agents.email_manager import EmailManager
-from agents.task_prioritiser import TaskPrioritiser
-from agents.calendar_optimiser import CalendarOptimiser
+from tools.task_store import get_task_store
+from tools.tracing import traced
 
 
-# Instantiate agents
-email_agent = EmailManager()
-prioritiser = TaskPrioritiser()
-calendar = CalendarOptimiser()
+# Agents (and their LLM clients) are built on first use, so importing the
+# graph stays cheap and works without API keys
+@functools.lru_cache(maxsize=None)
+def email_agent():
+    from agents.email_manager import EmailManager
 
+    return EmailManager()
 
-# Node functions (merge-aware dicts)
-def fetch_and_classify_emails(state: WorkflowState) -> WorkflowState:
-    result = email_agent.run(n=5)
+
+@functools.lru_cache(maxsize=None)
+def prioritiser():
+    from agents.task_prioritiser import TaskPrioritiser
+
+    return TaskPrioritiser()
+
+
+@functools.lru_cache(maxsize=None)
+def calendar():
+    from agents.calendar_optimiser import CalendarOptimiser
+
+    return CalendarOptimiser()
+
+
+# Node functions (return only the keys they produce; reducers merge them)
+@traced("node", "emails")
+def fetch_and_classify_emails(state: WorkflowState, config: RunnableConfig) -> WorkflowState:
+    # each email's results go out on the "custom" stream as soon as they are ready
+    writer = get_stream_writer()
+    result = email_agent().run(
+        n=state.get("email_limit", 5),
+        account={**(state.get("account") or {}), **run_secrets(config)},
+        on_result=lambda res: writer({"summaries": res["summaries"], "tasks": res["tasks"]}),
+        run_id=config.get("configurable", {}).get("thread_id"),
+    )
     return {
         "summaries": result.get("summaries", []),
         "tasks": result.get("tasks", []),
-        "logs": state.get("logs", []) + result.get("logs", []),
+        "earlier_tasks": result.get("earlier_tasks", {}),
+        "email_status": result.get("email_status", {}),
+        "logs": result.get("logs", []),
     }
 
 
+@traced("node", "fetch_calendar")
+def fetch_calendar(state: WorkflowState) -> WorkflowState:
+    # Independent of email processing, so it runs in a parallel branch
+    result = calendar().fetch(token_path=(state.get("account") or {}).get("calendar_token"))
+    return {
+        "events": result.get("events"),
+        "logs": result.get("logs", []),
+    }
+
+
+@traced("node", "prioritise")
 def prioritise_tasks(state: WorkflowState) -> WorkflowState:
-    result = prioritiser.run(state.get("tasks", []))
+    # Tasks persist across runs; only new or changed ones and those whose
+    # deadline bucket moved are re-prioritised, the rest keep their stored priority
+    tasks = state.get("tasks", [])
+    earlier = state.get("earlier_tasks") or {}
+    account = (state.get("account") or {}).get("email_user") or os.getenv("EMAIL_USER") or "default"
+    store = get_task_store()
+    # tasks this run repeats are reported as the stored task they duplicate;
+    # if that one never reached the store, this run's copy takes its id
+    stored = {t.id for t in store.get(account, list(earlier))}
+    missing = [t.model_copy(update={"id": key}) for key, t in earlier.items() if key not in stored]
+    new, changed, unchanged = store.upsert(account, tasks + missing)
+    result = prioritiser().run(store.stale(account))
+    store.set_priorities(account, result.get("tasks", []))
+    ids = dict.fromkeys([t.id or t.title for t in tasks] + list(earlier))
     return {
-        "summaries": state.get("summaries", []),
-        "tasks": result.get("tasks", []),
-        "logs": state.get("logs", []) + result.get("logs", []),
+        "tasks": store.get(account, list(ids)),
+        "logs": [f"Task store: {new} new, {changed} changed, {unchanged} unchanged; "
+                 f"re-prioritised {len(result.get('tasks', []))}."] + result.get("logs", []),
     }
 
+@traced("node", "calendar")
 def optimise_calendar(state: WorkflowState) -> WorkflowState:
-    result = calendar.run(state.get("tasks", []))  # now returns dict
+    result = calendar().run(
+        state.get("tasks", []),
+        events=state.get("events"),
+        token_path=(state.get("account") or {}).get("calendar_token"),
+    )  # now returns dict
     return {
-        "summaries": state.get("summaries", []),
-        "tasks": state.get("tasks", []),
-        "logs": state.get("logs", []) + result.get("logs", []),
+        "logs": result.get("logs", []),
         "calendar": result,
     }
 
@@ -43,13 +101,22 @@ def optimise_calendar(state: WorkflowState) -> WorkflowState:
 workflow = StateGraph(WorkflowState)
 
 workflow.add_node("emails", fetch_and_classify_emails)
+workflow.add_node("fetch_calendar", fetch_calendar)
 workflow.add_node("prioritise", prioritise_tasks)
 workflow.add_node("calendar", optimise_calendar)
 
-workflow.set_entry_point("emails")
+# emails -> prioritise runs alongside fetch_calendar; both join at scheduling
+workflow.add_edge(START, "emails")
+workflow.add_edge(START, "fetch_calendar")
 workflow.add_edge("emails", "prioritise")
-workflow.add_edge("prioritise", "calendar")
+workflow.add_edge(["prioritise", "fetch_calendar"], "calendar")
 workflow.add_edge("calendar", END)
 
-# Compile to runnable app
+# Plain compile for imports and one-off invokes; no checkpoint database is opened
 app = workflow.compile()
+
+
+@functools.lru_cache(maxsize=None)
+def get_app():
+    """The graph compiled with the SQLite checkpointer (if enabled), built on first use."""
+    return workflow.compile(checkpointer=get_checkpointer())
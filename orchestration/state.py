@@ -1,10 +1,20 @@
 # orchestration/state.py
-from typing import TypedDict, List, Optional
-from agents.schemas import Summary, Task, CalendarResult
+import operator
+from typing import Annotated, Dict, TypedDict, List, Optional
+from agents.schemas import Summary, Task, CalendarResult, CalendarEvent
 
 class WorkflowState(TypedDict, total=False):
-    """Shared state structure across the workflow."""
+    """Shared state structure across the workflow.
+
+    Branches run in parallel, so nodes return only the keys they produce;
+    `logs` is appended to by every node through its reducer.
+    """
+    account: dict
+    email_limit: int
     summaries: List[Summary]
+    email_status: Dict[str, str]  # email id -> "done" | "resumed" | "failed"
     tasks: List[Task]
-    logs: List[str]
+    earlier_tasks: Dict[str, Task]  # id of a task kept from an earlier run -> this run's duplicate of it
+    logs: Annotated[List[str], operator.add]
+    events: Optional[List[CalendarEvent]]
     calendar: Optional[CalendarResult]
@@ -0,0 +1,27 @@
+# tests/test_due_dates.py
+import sys
+from datetime import date
+
+from tools.due_dates import normalize_due
+
+if __name__ == "__main__":
+    today = date(2025, 3, 5)  # a Wednesday
+    cases = {
+        "2025-03-14": "2025-03-14",
+        "by Friday": "2025-03-07",
+        "tomorrow EOD": "2025-03-06",
+        "within 5 days": "2025-03-10",
+        # invalid ISO dates must not raise; they resolve to nothing
+        "2025-02-30": None,
+        "2025-13-01": None,
+        "": None,
+    }
+
+    print("=== Due dates ===")
+    failures = 0
+    for raw, expected in cases.items():
+        got = normalize_due(raw, today)
+        ok = got == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {raw!r} -> {got} (expected {expected})")
+    sys.exit(1 if failures else 0)
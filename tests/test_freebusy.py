@@ -0,0 +1,34 @@
+# tests/test_freebusy.py
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from tools.freebusy import FreeBusyIndex, free_gaps
+
+if __name__ == "__main__":
+    random.seed(7)
+    start = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+    horizon = start + timedelta(days=28)
+
+    # Dense synthetic calendar: ~6 events per day for four weeks
+    busy = []
+    for day in range(28):
+        for _ in range(6):
+            s = start + timedelta(days=day, minutes=random.randrange(0, 9 * 60, 15))
+            busy.append((s, s + timedelta(minutes=random.choice([15, 30, 45, 60]))))
+
+    t0 = time.perf_counter()
+    index = FreeBusyIndex(free_gaps(busy, start, horizon))
+    placed = [index.allocate(timedelta(minutes=30), buffer=timedelta(minutes=15)) for _ in range(500)]
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    slots = [p for p in placed if p]
+    print("=== Free/Busy Index ===")
+    print(f"Busy windows: {len(busy)} | Free gaps: {len(index)}")
+    print(f"Placed {len(slots)}/500 tasks in {elapsed_ms:.1f} ms")
+
+    # sanity: no placed slot overlaps a busy window or another slot
+    clashes = sum(1 for s, e in slots for bs, be in busy if bs < e and be > s)
+    ordered = sorted(slots)
+    overlaps = sum(1 for a, b in zip(ordered, ordered[1:]) if b[0] < a[1])
+    print(f"Clashes with events: {clashes} | Overlapping blocks: {overlaps}")
@@ -0,0 +1,47 @@
+# tests/test_import_time.py
+import os
+import subprocess
+import sys
+
+# Cold-start budget for `import orchestration.graph` (best of RUNS, in ms)
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "2000"))
+RUNS = 3
+# Provider SDKs and heavy helpers that must only load once they are used
+LAZY = ["openai", "langchain_openai", "langchain_google_genai", "google.genai", "googleapiclient", "dateparser", "tiktoken"]
+
+
+def import_profile(module: str) -> dict:
+    """Run `python -X importtime -c "import <module>"` without API keys.
+
+    Returns {module: (cumulative us, nesting depth)}.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.endswith("_API_KEY")}
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    ).stderr
+    profile = {}
+    for line in out.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                profile[name.strip()] = (int(cumulative), (len(name) - len(name.lstrip()) - 1) // 2)
+    return profile
+
+
+if __name__ == "__main__":
+    runs = [import_profile("orchestration.graph") for _ in range(RUNS)]
+    best = min(runs, key=lambda p: p["orchestration.graph"][0])
+    total_ms = best["orchestration.graph"][0] / 1000
+
+    print("=== Import time: orchestration.graph ===")
+    print(f"Best of {RUNS}: {total_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)")
+    # direct imports of the graph module, slowest first
+    top = sorted(((us, name) for name, (us, depth) in best.items() if depth == 1), reverse=True)[:5]
+    for us, name in top:
+        print(f"- {name}: {us / 1000:.0f} ms")
+
+    eager = [m for m in LAZY if m in best]
+    print(f"Eagerly imported SDKs: {eager or 'none'}")
+    if total_ms > BUDGET_MS or eager:
+        sys.exit(1)
@@ -1,6 +1,8 @@
 import datetime
-from orchestration.graph import app
+from orchestration.checkpoint import run_pipeline
 from agents.schemas import CalendarEvent, TimeBlock 
+from tools.llm_cache import get_llm_cache
+from tools.tracing import format_summary, start_run, summarise_run
 
 
 def save_logs(logs):
@@ -64,8 +66,9 @@ def print_results(result):
 
 
 if __name__ == "__main__":
+    start_run()
     state = {"summaries": [], "tasks": [], "logs": []}
-    result = app.invoke(state)
+    result = run_pipeline(state)  # resumes the last run if it was interrupted
 
     # save logs to file
     save_logs(result.get("logs", []))
@@ -73,4 +76,10 @@ if __name__ == "__main__":
     # pretty-print results
     print_results(result)
 
+    stats = get_llm_cache().stats()
+    print(f"\nLLM cache: {stats['hits']} hits / {stats['misses']} misses")
+
+    print("\n=== ⏱ Stage Timings ===")
+    for line in format_summary(summarise_run()):
+        print(line)
     print("\n(Logs saved to logs.txt)")
@@ -0,0 +1,51 @@
+# tests/test_scheduler.py
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from tools.freebusy import FreeBusyIndex, free_gaps
+from tools.scheduler import schedule_tasks
+
+if __name__ == "__main__":
+    random.seed(7)
+    now = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+    horizon = now + timedelta(days=30)
+
+    # A month of meetings (~6 per day) and a 500-task backlog
+    busy = []
+    for day in range(30):
+        for _ in range(6):
+            s = now + timedelta(days=day, minutes=random.randrange(0, 9 * 60, 15))
+            busy.append((s, s + timedelta(minutes=random.choice([15, 30, 45, 60]))))
+    tasks = [
+        {
+            "id": f"t{i}",
+            "title": f"Task {i}",
+            "priority": random.choice(["HIGH", "MED", "LOW"]),
+            "due_date": (now + timedelta(days=random.randrange(0, 35))).date().isoformat() if random.random() < 0.7 else None,
+            "estimate_min": random.choice([None, 15, 30, 60, 120, 240]),
+        }
+        for i in range(500)
+    ]
+
+    t0 = time.perf_counter()
+    index = FreeBusyIndex(free_gaps(busy, now, horizon))
+    plan = schedule_tasks(tasks, index, now, horizon)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    print("=== Scheduler ===")
+    print(f"Planned {len(tasks) - len(plan.unscheduled)}/{len(tasks)} tasks as {len(plan.blocks)} blocks in {elapsed_ms:.1f} ms")
+    print(f"Late: {len(plan.late)} | Unscheduled: {len(plan.unscheduled)}")
+
+    # sanity: blocks never overlap events or each other
+    slots = sorted((datetime.fromisoformat(b["start"]), datetime.fromisoformat(b["end"])) for b in plan.blocks)
+    clashes = sum(1 for s, e in slots for bs, be in busy if bs < e and be > s)
+    overlaps = sum(1 for a, b in zip(slots, slots[1:]) if b[0] < a[1])
+    print(f"Clashes with events: {clashes} | Overlapping blocks: {overlaps}")
+
+    # EDF: tasks are placed in deadline order (undated ones at their priority's default
+    # deadline), so the first day goes to the tasks due soonest, whatever their priority
+    by_id = {t["id"]: t for t in tasks}
+    first_day = {b["linked_task_id"] for b in plan.blocks if b["start"] < (now + timedelta(days=1)).isoformat()}
+    due_in = [(date.fromisoformat(by_id[i]["due_date"]) - now.date()).days for i in first_day if by_id[i]["due_date"]]
+    print(f"First day: {len(first_day)} tasks, {len(due_in)} with a due date, latest due in {max(due_in, default=0)} days")
@@ -0,0 +1,27 @@
+# tools/async_runner.py
+from __future__ import annotations
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-runner", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine on the shared background event loop and wait for it.
+
+    Async HTTP clients bind their connection pools to the loop they were
+    first used on, so every sync caller (graph nodes, batch worker threads)
+    goes through one long-lived loop instead of a fresh asyncio.run().
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
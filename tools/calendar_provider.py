@@ -1,63 +1,51 @@
 # tools/calendar_provider.py
 from __future__ import annotations
-import os
+import hashlib
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import List, Tuple
-
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from typing import Dict, List, Tuple
 
 from agents.schemas import CalendarEvent
+from tools.calendar_store import CalendarEventStore
+from tools.freebusy import FreeBusyIndex, free_gaps
+from tools.google_auth import get_service
+from tools.local_store import cache_path
+from tools.scheduler import Schedule, schedule_tasks
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 TOKEN_PATH = "secrets/token.json"
-CREDS_PATH = "secrets/credentials.json"
-
-
-def get_calendar_service():
-    """Authenticate and return a Google Calendar service client."""
-    creds = None
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
-
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(CREDS_PATH, SCOPES)
-            creds = flow.run_local_server(port=0)
-        os.makedirs(os.path.dirname(TOKEN_PATH), exist_ok=True)
-        with open(TOKEN_PATH, "w") as f:
-            f.write(creds.to_json())
-
-    return build("calendar", "v3", credentials=creds)
-
-
-def get_events(limit: int = 10) -> List[CalendarEvent]:
-    """Fetch upcoming events from the primary calendar."""
-    service = get_calendar_service()
-    now = datetime.now(timezone.utc).isoformat()
-    resp = service.events().list(
-        calendarId="primary",
-        timeMin=now,
-        maxResults=limit,
-        singleEvents=True,
-        orderBy="startTime",
-    ).execute()
-
-    events: List[CalendarEvent] = []
-    for e in resp.get("items", []):
-        events.append(
-            CalendarEvent(
-                id=e.get("id", ""),
-                title=e.get("summary", "Untitled"),
-                start=e.get("start", {}).get("dateTime") or e.get("start", {}).get("date"),
-                end=e.get("end", {}).get("dateTime") or e.get("end", {}).get("date"),
-            )
-        )
-    return events
+
+# One event store per token file, shared by every consumer in a run
+_event_stores: Dict[str, CalendarEventStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_calendar_service(token_path: str | None = None):
+    """Return the shared, cached Google Calendar service client."""
+    return get_service("calendar", "v3", token_path or TOKEN_PATH, SCOPES)
+
+
+def get_event_store(token_path: str | None = None) -> CalendarEventStore:
+    """Return the process-wide event store for an account's calendar."""
+    token_path = token_path or TOKEN_PATH
+    with _stores_lock:
+        if token_path not in _event_stores:
+            name = "calendar_events.json"
+            if token_path != TOKEN_PATH:
+                name = f"calendar_events_{hashlib.sha1(token_path.encode()).hexdigest()[:10]}.json"
+            _event_stores[token_path] = CalendarEventStore(path=cache_path(name))
+        return _event_stores[token_path]
+
+
+def get_events(limit: int = 10, token_path: str | None = None) -> List[CalendarEvent]:
+    """Fetch upcoming events from the primary calendar.
+
+    Served from the local event store, which is refreshed with syncToken
+    deltas at most once per refresh interval.
+    """
+    store = get_event_store(token_path)
+    store.refresh(lambda: get_calendar_service(token_path))
+    return [CalendarEvent(**e) for e in store.upcoming(limit)]
 
 
 def _parse_event_time(event: dict):
@@ -80,55 +68,44 @@ def _busy_windows(events: List[CalendarEvent]) -> List[Tuple[datetime, datetime]
     return busy
 
 
-def propose_time_blocks(
+def plan_time_blocks(
     tasks: list[dict],
     block_hours: int = 1,
     work_start: int = 9,
     work_end: int = 18,
     lookahead_days: int = 3,
-) -> list[dict]:
+    events: List[CalendarEvent] | None = None,
+) -> Schedule:
     """
-    Propose free time blocks for tasks across today and the next N days.
-    Returns list of dicts: {start, end, title, linked_task_id}.
+    Plan time blocks for tasks across today and the next N days.
+    Blocks are sized from each task's `estimate_min` (`block_hours` when
+    unset) and urgent tasks are placed first; see `schedule_tasks`.
+    Pass `events` to reuse an already fetched calendar.
     """
     now = datetime.now(timezone.utc)
     current = max(now, now.replace(hour=work_start, minute=0, second=0, microsecond=0))
-    events = get_events(limit=50)
+    if events is None:
+        events = get_events(limit=50)
     busy = _busy_windows(events)
 
-    proposals = []
-    day_limit = now.date() + timedelta(days=lookahead_days)
-
-    for t in tasks:
-        scheduled = False
-        while not scheduled:
-            # roll forward if past work hours
-            end_of_day = current.replace(hour=work_end, minute=0, second=0, microsecond=0)
-            if current >= end_of_day:
-                current = (current + timedelta(days=1)).replace(
-                    hour=work_start, minute=0, second=0, microsecond=0
-                )
-
-            # stop if beyond lookahead
-            if current.date() > day_limit:
-                break
-
-            block_end = current + timedelta(hours=block_hours)
-
-            # check overlap
-            overlap = any(bs < block_end and be > current for (bs, be) in busy)
-            if not overlap and block_end <= end_of_day:
-                proposals.append(
-                    {
-                        "start": current.isoformat(),
-                        "end": block_end.isoformat(),
-                        "title": t.get("title", "Task"),
-                        "linked_task_id": t.get("id"),
-                    }
-                )
-                current = block_end + timedelta(minutes=15)  # add buffer
-                scheduled = True
-            else:
-                current = current + timedelta(minutes=30)  # advance slot
-
-    return proposals
+    # Free gaps run through the end of the last lookahead day's working hours
+    last_day = now.replace(hour=work_end, minute=0, second=0, microsecond=0)
+    horizon = last_day + timedelta(days=lookahead_days)
+    index = FreeBusyIndex(free_gaps(busy, current, horizon, work_start, work_end))
+    return schedule_tasks(tasks, index, now, horizon, work_end=work_end, default_min=block_hours * 60)
+
+
+def propose_time_blocks(
+    tasks: list[dict],
+    block_hours: int = 1,
+    work_start: int = 9,
+    work_end: int = 18,
+    lookahead_days: int = 3,
+    events: List[CalendarEvent] | None = None,
+) -> list[dict]:
+    """
+    Propose free time blocks for tasks across today and the next N days.
+    Returns list of dicts: {start, end, title, linked_task_id}.
+    Tasks that do not fit in the lookahead window get no block.
+    """
+    return plan_time_blocks(tasks, block_hours, work_start, work_end, lookahead_days, events).blocks
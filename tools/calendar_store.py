@@ -0,0 +1,100 @@
+# tools/calendar_store.py
+from __future__ import annotations
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from tools.local_store import cache_path, load_json, save_json
+from tools.tracing import traced
+
+
+# A full sync only lists events that ended at most this many days ago
+FULL_SYNC_PAST_DAYS = 7
+
+
+def _start_key(value: str) -> datetime:
+    """Sortable UTC datetime for a dateTime or all-day date string."""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class CalendarEventStore:
+    """Local mirror of a calendar kept fresh with `syncToken` deltas.
+
+    The first refresh does a full `events.list` (from FULL_SYNC_PAST_DAYS ago)
+    and stores the returned `nextSyncToken`; later refreshes only transfer
+    events changed since then, and the file is only rewritten if they changed.
+    A 410 GONE from the API means the token expired and triggers a full
+    resync. Refreshes closer together than `min_refresh_s` are skipped, so
+    every consumer in one pipeline run shares a single sync.
+    """
+
+    def __init__(self, path: str | None = None, calendar_id: str = "primary", min_refresh_s: float = 60):
+        self.path = path or cache_path("calendar_events.json")
+        self.calendar_id = calendar_id
+        self.min_refresh_s = min_refresh_s
+        state = load_json(self.path, {})
+        self.sync_token: Optional[str] = state.get("sync_token")
+        self.events: Dict[str, dict] = state.get("events", {})
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, service_factory: Callable[[], object], force: bool = False) -> int:
+        """Pull changes from the API; returns the number of changed events."""
+        with self._lock:
+            if not force and time.time() - self.last_refresh < self.min_refresh_s:
+                return 0
+            service = service_factory()
+            changed, token = 0, self.sync_token
+            if self.sync_token:
+                try:
+                    changed = self._sync(service, syncToken=self.sync_token)
+                except HttpError as e:
+                    if e.resp.status != 410:
+                        raise
+                    self.sync_token = None
+            if not self.sync_token:
+                self.events = {}
+                since = datetime.now(timezone.utc) - timedelta(days=FULL_SYNC_PAST_DAYS)
+                changed = self._sync(service, timeMin=since.isoformat().replace("+00:00", "Z"))
+            self.last_refresh = time.time()
+            if changed or self.sync_token != token:
+                save_json(self.path, {"sync_token": self.sync_token, "events": self.events})
+            return changed
+
+    @traced("google", "calendar.events.list")
+    def _sync(self, service, **params) -> int:
+        changed, page_token = 0, None
+        while True:
+            resp = service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=True,
+                maxResults=2500,
+                pageToken=page_token,
+                **params,
+            ).execute()
+            for e in resp.get("items", []):
+                changed += 1
+                if e.get("status") == "cancelled":
+                    self.events.pop(e.get("id", ""), None)
+                    continue
+                start = e.get("start", {}).get("dateTime") or e.get("start", {}).get("date")
+                end = e.get("end", {}).get("dateTime") or e.get("end", {}).get("date")
+                if start and end:
+                    self.events[e["id"]] = {"id": e["id"], "title": e.get("summary", "Untitled"), "start": start, "end": end}
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                self.sync_token = resp.get("nextSyncToken")
+                return changed
+
+    def upcoming(self, limit: int, now: datetime | None = None) -> List[dict]:
+        """Events that have not ended yet, ordered by start time."""
+        now = now or datetime.now(timezone.utc)
+        live = [e for e in self.events.values() if _start_key(e["end"]) > now]
+        live.sort(key=lambda e: _start_key(e["start"]))
+        return live[:limit]
@@ -0,0 +1,76 @@
+# tools/doc_chunks.py
+from __future__ import annotations
+import re
+import zlib
+from typing import List
+
+from tools.tokens import count_tokens
+
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = re.compile(
+    rf"\b\d{{4}}-\d{{2}}-\d{{2}}\b|\b\d{{1,2}}[/.]\d{{1,2}}[/.]\d{{2,4}}\b"
+    rf"|\b{_MONTH} \d{{1,2}}(st|nd|rd|th)?\b|\b\d{{1,2}}(st|nd|rd|th)? {_MONTH}",
+    re.IGNORECASE,
+)
+# Short lines are headings if marked by _flatten ("# ") or if they carry a date
+MAX_HEADING_CHARS = 80
+# About one section in BOUNDARY_EVERY ends a chunk regardless of its size
+BOUNDARY_EVERY = 4
+
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS:
+        return False
+    return line.startswith("#") or bool(_DATE.search(line))
+
+
+def split_sections(text: str) -> List[str]:
+    """Split notes into sections, each starting at a heading or date line."""
+    sections: List[List[str]] = [[]]
+    for line in text.splitlines():
+        if _is_heading(line) and any(l.strip() for l in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(s).strip() for s in sections if any(l.strip() for l in s)]
+
+
+def _split_long(section: str, max_tokens: int) -> List[str]:
+    """Break an oversized section on line boundaries."""
+    parts, current, used = [], [], 0
+    for line in section.splitlines():
+        cost = count_tokens(line) + 1
+        if current and used + cost > max_tokens:
+            parts.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        parts.append("\n".join(current))
+    return parts
+
+
+def chunk_notes(text: str, max_tokens: int) -> List[str]:
+    """Group consecutive sections into chunks of at most ~`max_tokens`.
+
+    Besides the size limit, chunks also end after sections whose content
+    hash picks them as a cut point. Boundaries therefore depend on local
+    content, not on position: adding or editing one meeting's notes only
+    changes the chunks around it, and the rest keep their cached results.
+    """
+    chunks, current, used = [], [], 0
+    for section in split_sections(text):
+        pieces = _split_long(section, max_tokens) if count_tokens(section) > max_tokens else [section]
+        for piece in pieces:
+            cost = count_tokens(piece)
+            if current and used + cost > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+            if zlib.crc32(piece.encode()) % BOUNDARY_EVERY == 0:
+                chunks.append("\n\n".join(current))
+                current, used = [], 0
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
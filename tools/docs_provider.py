@@ -1,45 +1,63 @@
 # tools/docs_provider.py
 from __future__ import annotations
-import os
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from typing import Optional, Tuple
+
+from tools.google_auth import get_service
+from tools.local_store import cache_path, load_json, save_json
+from tools.tracing import span
 
 SCOPES = ["https://www.googleapis.com/auth/documents.readonly"]
 TOKEN_PATH = "secrets/docs_token.json"
-CREDS_PATH = "secrets/credentials.json"
-
 
-def get_docs_service():
-    """Authenticate and return a Google Docs API service client."""
-    creds = None
-    if os.path.exists(TOKEN_PATH):
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+# Only what text extraction reads (text runs plus heading styles); skips lists and inline objects
+TEXT_FIELDS = "revisionId,body(content(paragraph(paragraphStyle(namedStyleType),elements(textRun(content)))))"
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(CREDS_PATH, SCOPES)
-            creds = flow.run_local_server(port=0)
-        os.makedirs(os.path.dirname(TOKEN_PATH), exist_ok=True)
-        with open(TOKEN_PATH, "w") as f:
-            f.write(creds.to_json())
 
-    return build("docs", "v1", credentials=creds)
+def get_docs_service(token_path: str | None = None):
+    """Return the shared, cached Google Docs API service client."""
+    return get_service("docs", "v1", token_path or TOKEN_PATH, SCOPES)
 
 
-def fetch_doc_text(doc_id: str) -> str:
-    """Return full plain text from a Google Doc."""
-    service = get_docs_service()
-    doc = service.documents().get(documentId=doc_id).execute()
-
+def _flatten(doc: dict) -> str:
+    """Plain text of a doc; headings are prefixed with "# " so notes can be split on them."""
     text_chunks = []
     for c in doc.get("body", {}).get("content", []):
         if "paragraph" in c:
+            style = c["paragraph"].get("paragraphStyle", {}).get("namedStyleType", "")
+            if style.startswith("HEADING") or style == "TITLE":
+                text_chunks.append("# ")
             for elem in c["paragraph"].get("elements", []):
                 if "textRun" in elem:
                     text_chunks.append(elem["textRun"].get("content", ""))
 
     return "".join(text_chunks).strip()
+
+
+def fetch_doc(doc_id: str, token_path: str | None = None) -> Tuple[str, Optional[str]]:
+    """Return (plain text, revisionId) for a Google Doc.
+
+    Text is cached per doc and revision. When a cached copy exists only
+    the revisionId is requested; the text is re-downloaded (with a field
+    mask covering just the text runs) only if the revision changed.
+    """
+    service = get_docs_service(token_path)
+    path = cache_path("docs", f"{doc_id}.json")
+    cached = load_json(path)
+
+    if cached:
+        with span("docs.revision", "google", doc_id=doc_id):
+            head = service.documents().get(documentId=doc_id, fields="revisionId").execute()
+        if head.get("revisionId") and head["revisionId"] == cached.get("revision_id"):
+            return cached["text"], cached["revision_id"]
+
+    with span("docs.get", "google", doc_id=doc_id):
+        doc = service.documents().get(documentId=doc_id, fields=TEXT_FIELDS).execute()
+    text, revision_id = _flatten(doc), doc.get("revisionId")
+    if revision_id:
+        save_json(path, {"revision_id": revision_id, "text": text})
+    return text, revision_id
+
+
+def fetch_doc_text(doc_id: str) -> str:
+    """Return full plain text from a Google Doc."""
+    return fetch_doc(doc_id)[0]
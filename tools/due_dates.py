@@ -0,0 +1,93 @@
+# tools/due_dates.py
+from __future__ import annotations
+import functools
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+# Languages dateparser may try; detecting among all of them is what makes its first call slow
+LANGUAGES: List[str] = [l.strip() for l in os.getenv("DATE_LANGUAGES", "en").split(",") if l.strip()]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+            "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+_LEAD = re.compile(r"^(?:(?:no later than|by|before|until|till|on|due|the|at|for)\s+)+")
+_TIME_OF_DAY = re.compile(
+    r"\s+(?:morning|afternoon|evening|night|noon|midday|eod|cob|end of (?:the )?day"
+    r"|at \d{1,2}(?::\d{2})?\s*(?:am|pm)?|\d{1,2}(?::\d{2})?\s*(?:am|pm))$"
+)
+_ISO = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_RELATIVE = re.compile(rf"(?:in|within)\s+(\d+|{'|'.join(_NUMBERS)})\s+(day|week)s?")
+_WEEKDAY = re.compile(rf"(?:this\s+)?({'|'.join(WEEKDAYS)}|{'|'.join(d[:3] for d in WEEKDAYS)})")
+_TODAY = re.compile(r"today|tonight|eod|cob|end of (?:the )?day|this (?:morning|afternoon|evening)")
+
+
+def _fast(phrase: str, today: date) -> Optional[date]:
+    """Common deadline phrases, relative to `today`; None means "not recognised"."""
+    m = _ISO.fullmatch(phrase)
+    if m:
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return None  # e.g. "2025-02-30"
+    if _TODAY.fullmatch(phrase):
+        return today
+    if phrase == "tomorrow":
+        return today + timedelta(days=1)
+    if phrase == "day after tomorrow":
+        return today + timedelta(days=2)
+    if phrase in ("next week", "in a week"):
+        return today + timedelta(days=7)
+    if phrase in ("end of week", "end of the week", "eow", "this week"):
+        return today + timedelta(days=(4 - today.weekday()) % 7)
+    m = _RELATIVE.fullmatch(phrase)
+    if m:
+        n = int(m.group(1)) if m.group(1).isdigit() else _NUMBERS[m.group(1)]
+        return today + timedelta(days=n * (7 if m.group(2) == "week" else 1))
+    m = _WEEKDAY.fullmatch(phrase)
+    if m:
+        target = next(i for i, d in enumerate(WEEKDAYS) if d.startswith(m.group(1)))
+        # like dateparser with PREFER_DATES_FROM=future: the same weekday means next week
+        return today + timedelta(days=(target - today.weekday()) % 7 or 7)
+    return None
+
+
+def _dateparser(raw: str, today: date) -> Optional[date]:
+    import dateparser  # heavy import, only needed for unusual phrases
+
+    dt = dateparser.parse(
+        raw,
+        languages=LANGUAGES,
+        settings={"PREFER_DATES_FROM": "future", "RELATIVE_BASE": datetime.combine(today, datetime.min.time())},
+    )
+    return dt.date() if dt else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve(raw: str, today: date) -> Optional[str]:
+    phrase = " ".join(raw.lower().replace(",", " ").split())
+    phrase = _TIME_OF_DAY.sub("", _LEAD.sub("", phrase))
+    day = _fast(phrase, today)
+    # dateparser would read an invalid ISO date like "2025-13-01" as year-day-month
+    if day is None and not _ISO.fullmatch(phrase):
+        day = _dateparser(raw, today)
+    return day.isoformat() if day else None
+
+
+def normalize_due(raw: str | None, today: date | None = None) -> str | None:
+    """Resolve a deadline phrase ("by Friday", "within 5 days", ISO dates...) to YYYY-MM-DD.
+
+    Common phrases are handled by regexes; the rest go to dateparser,
+    limited to DATE_LANGUAGES. Results are memoised per (phrase, reference date).
+    """
+    if not raw or not raw.strip():
+        return None
+    return _resolve(raw.strip(), today or date.today())
+
+
+def warm_up() -> None:
+    """Load dateparser's English data in the background so the first fallback is fast."""
+    threading.Thread(target=_dateparser, args=("in 2 days", date.today()), daemon=True).start()
@@ -0,0 +1,143 @@
+# tools/freebusy.py
+from __future__ import annotations
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and merge overlapping or touching (start, end) intervals."""
+    merged: List[Interval] = []
+    for start, end in sorted(i for i in intervals if i[1] > i[0]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_gaps(
+    busy: Iterable[Interval],
+    window_start: datetime,
+    window_end: datetime,
+    work_start: int = 9,
+    work_end: int = 18,
+) -> List[Interval]:
+    """Return the free working-hour gaps between window_start and window_end.
+
+    Busy intervals are merged once, then a single sweep over the days and
+    the merged list yields the sorted free gaps.
+    """
+    merged = merge_intervals(busy)
+    gaps: List[Interval] = []
+    idx = 0
+    day = window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < window_end:
+        lo = max(window_start, day.replace(hour=work_start))
+        hi = min(window_end, day.replace(hour=work_end))
+        # skip busy windows that ended before today's working hours
+        while idx < len(merged) and merged[idx][1] <= lo:
+            idx += 1
+        cursor, j = lo, idx
+        while cursor < hi and j < len(merged) and merged[j][0] < hi:
+            if merged[j][0] > cursor:
+                gaps.append((cursor, merged[j][0]))
+            cursor = max(cursor, merged[j][1])
+            j += 1
+        if cursor < hi:
+            gaps.append((cursor, hi))
+        day += timedelta(days=1)
+    return gaps
+
+
+class FreeBusyIndex:
+    """Ordered free-gap index with first-fit allocation in O(log n).
+
+    Gaps are kept sorted by start time, with a max segment tree over their
+    remaining lengths. `allocate` finds the earliest gap that can hold the
+    requested duration and shrinks it from the front. Allocations are
+    journalled, so a caller can `rollback` to a `mark` to undo them.
+    """
+
+    def __init__(self, gaps: List[Interval]):
+        self._journal: List[Tuple[int, datetime]] = []
+        self.starts = [g[0] for g in gaps]
+        self.ends = [g[1] for g in gaps]
+        self.size = 1
+        while self.size < max(1, len(gaps)):
+            self.size *= 2
+        self.tree = [0.0] * (2 * self.size)
+        for i in range(len(gaps)):
+            self.tree[self.size + i] = (self.ends[i] - self.starts[i]).total_seconds()
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _update(self, i: int) -> None:
+        pos = self.size + i
+        self.tree[pos] = max(0.0, (self.ends[i] - self.starts[i]).total_seconds())
+        pos //= 2
+        while pos:
+            self.tree[pos] = max(self.tree[2 * pos], self.tree[2 * pos + 1])
+            pos //= 2
+
+    def _first_fit(self, lo: int, need: float) -> Optional[int]:
+        """Leftmost gap index >= lo whose length is at least `need` seconds."""
+
+        def descend(node: int, node_lo: int, node_hi: int) -> Optional[int]:
+            if node_hi <= lo or self.tree[node] < need:
+                return None
+            if node >= self.size:
+                return node - self.size
+            mid = (node_lo + node_hi) // 2
+            found = descend(2 * node, node_lo, mid)
+            return found if found is not None else descend(2 * node + 1, mid, node_hi)
+
+        return descend(1, 0, self.size)
+
+    def allocate(
+        self,
+        duration: timedelta,
+        buffer: timedelta = timedelta(0),
+        not_before: Optional[datetime] = None,
+    ) -> Optional[Interval]:
+        """Reserve the earliest slot of `duration`; returns None if nothing fits.
+
+        `buffer` is kept free after the block; `not_before` skips earlier gaps.
+        """
+        need = duration.total_seconds()
+        lo = 0
+        if not_before is not None:
+            lo = bisect_right(self.ends, not_before)
+            # the gap straddling not_before only counts from not_before onward
+            if lo < len(self) and self.starts[lo] < not_before:
+                if self.ends[lo] - not_before >= duration:
+                    return self._take(lo, not_before, duration, buffer)
+                lo += 1
+        idx = self._first_fit(lo, need)
+        if idx is None:
+            return None
+        return self._take(idx, self.starts[idx], duration, buffer)
+
+    def mark(self) -> int:
+        return len(self._journal)
+
+    def rollback(self, mark: int) -> None:
+        """Undo every allocation made since `mark()` returned `mark`."""
+        while len(self._journal) > mark:
+            idx, start = self._journal.pop()
+            self.starts[idx] = start
+            self._update(idx)
+
+    def _take(self, idx: int, start: datetime, duration: timedelta, buffer: timedelta) -> Interval:
+        # anything before `start` in this gap is given up, like a moving cursor
+        self._journal.append((idx, self.starts[idx]))
+        end = start + duration
+        self.starts[idx] = min(end + buffer, self.ends[idx])
+        self._update(idx)
+        return start, end
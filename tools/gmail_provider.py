@@ -1,12 +1,32 @@
+import hashlib
 import imaplib
 import email
 from email.header import decode_header
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Tuple
 import os
+import re
 from dotenv import load_dotenv
 
+from tools.imap_parse import decode_part, find_text_part, parse_fetch_response
+from tools.local_store import cache_path, load_json, save_json
+from tools.mail_text import extract_text
+from tools.tracing import traced
+
 load_dotenv()
 
+IMAP_HOST = os.getenv("IMAP_HOST", "imap.gmail.com")
+IMAP_PORT = int(os.getenv("IMAP_PORT", 993))
+IMAP_SSL = os.getenv("IMAP_SSL", "1") == "1"
+MAILBOX = "inbox"
+SEARCH_QUERY = 'X-GM-RAW "category:primary"'
+# One checkpoint file per mailbox, so accounts fetched in parallel never share a file
+CHECKPOINT_DIR = "imap"
+LEGACY_CHECKPOINT_FILE = "imap_checkpoint.json"
+HEADER_FIELDS = "FROM TO SUBJECT DATE LIST-UNSUBSCRIBE LIST-ID PRECEDENCE AUTO-SUBMITTED"
+# Headers passed through in each email's "headers" dict (for the pre-classifier)
+EXTRA_HEADERS = ("list-unsubscribe", "list-id", "precedence", "auto-submitted")
+MAX_BODY_BYTES = int(os.getenv("EMAIL_MAX_BODY_BYTES", 64 * 1024))
+
 
 def decode_mime_header(raw_subject: str) -> str:
     """Decode MIME-encoded email subject into a readable string."""
@@ -22,54 +42,170 @@ def decode_mime_header(raw_subject: str) -> str:
     return decoded
 
 
-def fetch_emails(limit: int = 5) -> List[Dict]:
-    """Fetch the most recent emails from Gmail Primary inbox using IMAP."""
-    user = os.getenv("EMAIL_USER")
-    password = os.getenv("EMAIL_PASS")
+def _uidvalidity(imap: imaplib.IMAP4) -> int:
+    """Return the UIDVALIDITY of the selected mailbox."""
+    _, data = imap.response("UIDVALIDITY")
+    if not data or data[0] is None:
+        _, data = imap.status(MAILBOX, "(UIDVALIDITY)")
+        match = re.search(rb"UIDVALIDITY (\d+)", data[0] or b"")
+        return int(match.group(1)) if match else 0
+    return int(data[0])
+
+
+def _checkpoint_path(user: str) -> str:
+    digest = hashlib.sha1(f"{user}:{MAILBOX}".encode()).hexdigest()[:16]
+    return cache_path(CHECKPOINT_DIR, f"{digest}.json")
+
+
+def load_checkpoint(user: str) -> Dict[str, int] | None:
+    """Return the stored {uidvalidity, last_uid} for this account's mailbox."""
+    checkpoint = load_json(_checkpoint_path(user))
+    if checkpoint is None:  # written before checkpoints were split per account
+        checkpoint = load_json(cache_path(LEGACY_CHECKPOINT_FILE), {}).get(f"{user}:{MAILBOX}")
+    return checkpoint
+
+
+def save_checkpoint(user: str, uidvalidity: int, last_uid: int) -> None:
+    save_json(_checkpoint_path(user), {"uidvalidity": uidvalidity, "last_uid": last_uid})
+
+
+def _bulk_fetch(imap: imaplib.IMAP4, uids: List[bytes]) -> List[Dict]:
+    """Fetch a set of messages in a constant number of round trips.
+
+    One FETCH pulls headers and BODYSTRUCTURE for the whole set; then one
+    FETCH per distinct body section (usually one or two) downloads only the
+    text part, so attachments never cross the wire. Each body is a
+    partial fetch capped at MAX_BODY_BYTES.
+    """
+    if not uids:
+        return []
+    uid_set = b",".join(uids).decode()
+
+    status, data = imap.uid(
+        "FETCH", uid_set, f"(UID BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS ({HEADER_FIELDS})])"
+    )
+    if status != "OK":
+        raise RuntimeError("Failed to fetch message headers")
+    meta = parse_fetch_response(data)
+
+    # Group messages by the section holding their text so each group is one FETCH
+    parts: Dict[str, Dict[str, str]] = {}
+    by_section: Dict[str, List[str]] = {}
+    for uid, fields in meta.items():
+        part = find_text_part(fields.get("BODYSTRUCTURE"))
+        if part:
+            parts[uid] = part
+            by_section.setdefault(part["section"], []).append(uid)
+
+    bodies: Dict[str, str] = {}
+    for section, group in by_section.items():
+        status, data = imap.uid(
+            "FETCH", ",".join(group), f"(UID BODY.PEEK[{section}]<0.{MAX_BODY_BYTES}>)"
+        )
+        if status != "OK":
+            continue
+        for uid, fields in parse_fetch_response(data).items():
+            payload = fields.get(f"BODY[{section}]<0>", fields.get(f"BODY[{section}]"))
+            if isinstance(payload, bytes) and uid in parts:
+                part = parts[uid]
+                raw = decode_part(payload, part["encoding"], part["charset"])
+                bodies[uid] = extract_text(raw, part["subtype"])
+
+    emails = []
+    for raw_uid in uids:  # keep search order regardless of response order
+        uid = raw_uid.decode()
+        fields = meta.get(uid)
+        if fields is None:
+            continue
+        header_key = next((k for k in fields if k.startswith("BODY[HEADER.FIELDS")), None)
+        headers = email.message_from_bytes(fields.get(header_key) or b"")
+        emails.append({
+            "id": uid,
+            "from": headers.get("From"),
+            "to": headers.get("To"),
+            "subject": decode_mime_header(headers.get("Subject")),  # 👈 FIX
+            "body": bodies.get(uid, "").strip(),
+            "headers": {h: headers[h] for h in EXTRA_HEADERS if headers.get(h)},
+        })
+    return emails
+
+
+def commit_checkpoint(pending: Dict[str, Any], failed_uids: Iterable[str] = ()) -> None:
+    """Save a checkpoint returned by fetch_new_emails once its emails are processed.
+
+    It stops just below the lowest failed UID, so that email (and everything
+    after it) is fetched again on the next run.
+    """
+    last_uid = pending["last_uid"]
+    failed = [int(u) for u in failed_uids]
+    if failed:
+        last_uid = max(pending["previous_uid"], min(min(failed) - 1, last_uid))
+    save_checkpoint(pending["user"], pending["uidvalidity"], last_uid)
+
+
+@traced("imap", "imap.fetch_emails")
+def fetch_new_emails(
+    limit: int = 5,
+    incremental: bool | None = None,
+    user: str | None = None,
+    password: str | None = None,
+) -> Tuple[List[Dict], Dict[str, Any] | None]:
+    """Fetch emails from Gmail Primary inbox using IMAP.
+
+    By default returns the most recent `limit` messages. In incremental mode
+    (or with EMAIL_INCREMENTAL=1) only messages with a UID above the stored
+    checkpoint are returned, oldest first. A changed UIDVALIDITY invalidates
+    the checkpoint and it is rebuilt. The advanced checkpoint is returned
+    (None when not incremental) but not saved: pass it to commit_checkpoint
+    after the emails are processed, so a crash or failure does not skip them.
+    `user`/`password` default to EMAIL_USER/EMAIL_PASS.
+    """
+    user = user or os.getenv("EMAIL_USER")
+    password = password or os.getenv("EMAIL_PASS")
 
     if not user or not password:
         raise RuntimeError("EMAIL_USER and EMAIL_PASS must be set in .env")
 
-    imap = imaplib.IMAP4_SSL("imap.gmail.com")
+    if incremental is None:
+        incremental = os.getenv("EMAIL_INCREMENTAL", "0") == "1"
+
+    imap = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT) if IMAP_SSL else imaplib.IMAP4(IMAP_HOST, IMAP_PORT)
     imap.login(user, password)
-    imap.select("inbox")
+    imap.select(MAILBOX)
+
+    uidvalidity = _uidvalidity(imap)
+    checkpoint = load_checkpoint(user) if incremental else None
+    if checkpoint and checkpoint["uidvalidity"] != uidvalidity:
+        checkpoint = None  # mailbox was rebuilt server-side; UIDs are no longer comparable
 
-    status, data = imap.search(None, 'X-GM-RAW "category:primary"')
+    last_uid = checkpoint["last_uid"] if checkpoint else 0
+    criteria = f"UID {last_uid + 1}:* {SEARCH_QUERY}" if checkpoint else SEARCH_QUERY
+
+    status, data = imap.uid("SEARCH", None, criteria)
     if status != "OK":
         raise RuntimeError("Failed to search mailbox")
 
-    mail_ids = data[0].split()[-limit:]
-    emails = []
+    # "n:*" always matches the newest message, even when its UID is below n
+    uids = [u for u in data[0].split() if int(u) > last_uid]
+    mail_ids = uids[:limit] if checkpoint else uids[-limit:]
 
-    for mid in mail_ids:
-        status, msg_data = imap.fetch(mid, "(RFC822)")
-        if status != "OK":
-            continue
+    emails = _bulk_fetch(imap, mail_ids)
 
-        msg = email.message_from_bytes(msg_data[0][1])
-        body = ""
-
-        if msg.is_multipart():
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                if content_type == "text/plain":
-                    body = part.get_payload(decode=True).decode(errors="ignore")
-                    break
-                elif content_type == "text/html" and not body:
-                    # fallback if no plain text
-                    body = part.get_payload(decode=True).decode(errors="ignore")
-        else:
-            body = msg.get_payload(decode=True).decode(errors="ignore")
+    imap.logout()
 
-        emails.append({
-            "id": mid.decode(),
-            "from": msg.get("From"),
-            "to": msg.get("To"),
-            "subject": decode_mime_header(msg.get("Subject")),  # 👈 FIX
-            "body": body.strip()
-        })
+    if not incremental:
+        return emails, None
+    # A fresh checkpoint starts at the newest message so older mail is not replayed
+    newest = max((int(u) for u in (mail_ids if checkpoint else uids)), default=last_uid)
+    pending = {"user": user, "uidvalidity": uidvalidity, "previous_uid": last_uid, "last_uid": max(newest, last_uid)}
+    return emails, pending
 
-    imap.logout()
+
+def fetch_emails(limit: int = 5, incremental: bool | None = None, user: str | None = None, password: str | None = None) -> List[Dict]:
+    """fetch_new_emails, advancing the checkpoint straight away."""
+    emails, pending = fetch_new_emails(limit, incremental, user, password)
+    if pending:
+        commit_checkpoint(pending)
     return emails
 
 
@@ -0,0 +1,75 @@
+# tools/google_auth.py
+from __future__ import annotations
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+CREDS_PATH = "secrets/credentials.json"
+
+# Refresh a little before expiry so no request goes out with a stale token
+REFRESH_MARGIN = timedelta(minutes=5)
+
+_creds: Dict[str, Credentials] = {}
+_persisted: Dict[str, str] = {}
+_lock = threading.Lock()
+# httplib2 connections are not thread-safe, so built services are per thread
+_local = threading.local()
+
+
+def _expiring(creds: Credentials) -> bool:
+    if creds.expiry is None:
+        return False
+    # google-auth keeps expiry as a naive UTC datetime
+    return creds.expiry - datetime.utcnow() < REFRESH_MARGIN
+
+
+def _persist(token_path: str, creds: Credentials) -> None:
+    """Write the token file only when its contents actually changed."""
+    data = creds.to_json()
+    if _persisted.get(token_path) == data:
+        return
+    os.makedirs(os.path.dirname(token_path), exist_ok=True)
+    with open(token_path, "w") as f:
+        f.write(data)
+    _persisted[token_path] = data
+
+
+def get_credentials(token_path: str, scopes: List[str]) -> Credentials:
+    """Return in-memory credentials for a token file, refreshing them ahead of expiry."""
+    with _lock:
+        creds = _creds.get(token_path)
+        if creds is None and os.path.exists(token_path):
+            creds = Credentials.from_authorized_user_file(token_path, scopes)
+            _persisted[token_path] = creds.to_json()
+
+        if creds and creds.refresh_token and (not creds.valid or _expiring(creds)):
+            creds.refresh(Request())
+        elif not creds or not creds.valid:
+            flow = InstalledAppFlow.from_client_secrets_file(CREDS_PATH, scopes)
+            creds = flow.run_local_server(port=0)
+
+        _creds[token_path] = creds
+        # also catches refreshes done by the HTTP transport behind our back
+        _persist(token_path, creds)
+        return creds
+
+
+def get_service(api: str, version: str, token_path: str, scopes: List[str]):
+    """Return a cached API client built from the bundled discovery document.
+
+    The client (and its keep-alive HTTP connection) is reused for every
+    call on the same thread.
+    """
+    creds = get_credentials(token_path, scopes)
+    services: Dict[Tuple[str, str, str], object] = getattr(_local, "services", None) or {}
+    _local.services = services
+    key = (api, version, token_path)
+    if key not in services:
+        services[key] = build(api, version, credentials=creds, static_discovery=True, cache_discovery=False)
+    return services[key]
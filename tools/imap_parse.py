@@ -0,0 +1,139 @@
+# tools/imap_parse.py
+from __future__ import annotations
+import base64
+import quopri
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Atoms may carry a bracketed section and partial suffix, e.g. BODY[HEADER.FIELDS (FROM)]<0>
+_TOKEN = re.compile(
+    rb'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<quoted>(?:\\.|[^"\\])*)"'
+    rb"|\{(?P<literal>\d+)\}$|(?P<atom>[^\s()\"{\[\]]+(?:\[[^\]]*\])?(?:<\d+>)?))"
+)
+
+
+def _tokenize(chunk: bytes, out: List[Any]) -> None:
+    pos = 0
+    while pos < len(chunk):
+        m = _TOKEN.match(chunk, pos)
+        if not m or m.end() == pos:
+            break
+        pos = m.end()
+        if m.group("open"):
+            out.append("(")
+        elif m.group("close"):
+            out.append(")")
+        elif m.group("quoted") is not None:
+            out.append(re.sub(rb"\\(.)", rb"\1", m.group("quoted")))
+        elif m.group("literal") is not None:
+            pass  # the literal bytes follow as the second half of the tuple
+        elif m.group("atom") is not None:
+            atom = m.group("atom").decode("ascii", errors="replace")
+            out.append(None if atom.upper() == "NIL" else atom)
+
+
+def _build(tokens: List[Any], pos: int) -> Tuple[Any, int]:
+    tok = tokens[pos]
+    if tok == "(":
+        items, pos = [], pos + 1
+        while pos < len(tokens) and tokens[pos] != ")":
+            item, pos = _build(tokens, pos)
+            items.append(item)
+        return items, pos + 1
+    return tok, pos + 1
+
+
+def parse_fetch_response(data: List[Any]) -> Dict[str, Dict[str, Any]]:
+    """Parse the raw `imap.uid("FETCH", ...)` payload into {uid: {item: value}}.
+
+    imaplib hands back a flat list mixing plain lines and (line, literal)
+    tuples; a single message may span several entries. Literal and quoted
+    strings are returned as bytes, atoms as str and NIL as None.
+    """
+    tokens: List[Any] = []
+    for entry in data:
+        if entry is None:
+            continue
+        if isinstance(entry, tuple):
+            _tokenize(entry[0], tokens)
+            tokens.append(bytes(entry[1]))
+        else:
+            _tokenize(entry, tokens)
+
+    messages: Dict[str, Dict[str, Any]] = {}
+    pos = 0
+    while pos < len(tokens):
+        # each response is "<seq> ( key value key value ... )"
+        if tokens[pos] == "(" or pos + 1 >= len(tokens) or tokens[pos + 1] != "(":
+            pos += 1
+            continue
+        items, pos = _build(tokens, pos + 1)
+        fields = {str(items[i]).upper(): items[i + 1] for i in range(0, len(items) - 1, 2)}
+        if "UID" in fields:
+            messages[str(fields["UID"])] = fields
+    return messages
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="ignore")
+    return value or ""
+
+
+def _params(value: Any) -> Dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {_text(value[i]).lower(): _text(value[i + 1]) for i in range(0, len(value) - 1, 2)}
+
+
+def find_text_part(structure: Any) -> Optional[Dict[str, str]]:
+    """Pick the body section to download from a parsed BODYSTRUCTURE.
+
+    Returns {section, subtype, encoding, charset} for the first inline
+    text/plain part, falling back to the first text/html part.
+    """
+    candidates: List[Dict[str, str]] = []
+
+    def walk(node: Any, section: str) -> None:
+        if not isinstance(node, list) or not node:
+            return
+        if isinstance(node[0], list):
+            # multipart: child parts first, then the subtype and extension data
+            for idx, child in enumerate(node, start=1):
+                if not isinstance(child, list):
+                    break
+                walk(child, f"{section}.{idx}" if section else str(idx))
+            return
+        ctype, subtype = _text(node[0]).lower(), _text(node[1]).lower()
+        if ctype != "text" or subtype not in ("plain", "html"):
+            return
+        disposition = node[9] if len(node) > 9 else None
+        if isinstance(disposition, list) and _text(disposition[0]).lower() == "attachment":
+            return
+        candidates.append({
+            "section": section or "1",
+            "subtype": subtype,
+            "encoding": _text(node[5]).lower() if len(node) > 5 else "7bit",
+            "charset": _params(node[2]).get("charset", "utf-8"),
+        })
+
+    walk(structure, "")
+    for wanted in ("plain", "html"):
+        for part in candidates:
+            if part["subtype"] == wanted:
+                return part
+    return None
+
+
+def decode_part(payload: bytes, encoding: str, charset: str) -> str:
+    """Undo the transfer encoding of a body section and decode its charset."""
+    if encoding == "base64":
+        # a truncated section may end mid-quantum; drop the partial group
+        compact = re.sub(rb"[^A-Za-z0-9+/=]", b"", payload)
+        payload = base64.b64decode(compact[: len(compact) - len(compact) % 4] or b"")
+    elif encoding == "quoted-printable":
+        payload = quopri.decodestring(payload)
+    try:
+        return payload.decode(charset or "utf-8", errors="ignore")
+    except LookupError:
+        return payload.decode("utf-8", errors="ignore")
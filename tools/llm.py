@@ -1,41 +1,106 @@
 # tools/llm.py
 from __future__ import annotations
+import functools
 import os
-from typing import Dict
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Callable, Optional, Tuple, Type
 from dotenv import load_dotenv
 
 from langchain_core.language_models import BaseChatModel
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
+
+from tools.llm_cache import cache_enabled, get_llm_cache
+from tools.rate_limit import get_rate_limit_handler, get_rate_limiter
+from tools.tracing import get_trace_handler
 
 load_dotenv()
 
-# Simple in-memory cache for prompt responses
-_llm_cache: Dict[str, str] = {}
+# "openai" or "google"; only the selected provider's SDK is ever imported
+PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+DEFAULT_MODELS = {"openai": "gpt-4o-mini", "google": "gemini-1.5-flash"}
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
 
+# Optional stand-in model factory (used by the offline benchmarks)
+_llm_factory: Optional[Callable[..., BaseChatModel]] = None
 
-def get_llm() -> BaseChatModel:
-    """Return a configured OpenAI chat model."""
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if not openai_key:
-        raise ValueError("OPENAI_API_KEY not set. Please configure in .env")
 
-    return ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
+def set_llm_factory(factory: Optional[Callable[..., BaseChatModel]]) -> None:
+    """Route get_llm() to `factory(cache=..., callbacks=..., rate_limiter=...)`; None restores the provider."""
+    global _llm_factory
+    _llm_factory = factory
+    get_llm.cache_clear()
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-def call_llm(prompt: str) -> str:
-    """Call LLM with retries and simple caching."""
-    if prompt in _llm_cache:
-        return _llm_cache[prompt]
+def retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """Errors worth another attempt; 429s wait for the limiter's pause first."""
+    import openai  # also raised by the benchmark's fake model
+
+    return (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+def _openai_model(**kwargs) -> BaseChatModel:
+    from langchain_openai import ChatOpenAI
 
+    if not os.getenv("OPENAI_API_KEY"):
+        raise ValueError("OPENAI_API_KEY not set. Please configure in .env")
+    return ChatOpenAI(
+        model=os.getenv("LLM_MODEL", DEFAULT_MODELS["openai"]),
+        temperature=0.2,
+        include_response_headers=True,
+        max_retries=0,  # retried in get_llm so the limiter sees every 429
+        **kwargs,
+    )
+
+
+def _google_model(**kwargs) -> BaseChatModel:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise ValueError("GOOGLE_API_KEY not set. Please configure in .env")
+    return ChatGoogleGenerativeAI(
+        model=os.getenv("LLM_MODEL", DEFAULT_MODELS["google"]),
+        temperature=0.2,
+        max_retries=0,
+        **kwargs,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm(use_cache: bool | None = None) -> Runnable:
+    """Return the configured chat model, built once per process.
+
+    Responses go through the persistent on-disk cache unless `use_cache`
+    is False or LLM_CACHE=off is set. Every request draws from the shared
+    adaptive rate limiter and transient failures are retried after it.
+    """
+    if use_cache is None:
+        use_cache = cache_enabled()
+    cache = get_llm_cache() if use_cache else False
+    callbacks = [h for h in (get_trace_handler(), get_rate_limit_handler()) if h is not None]
+    kwargs = dict(cache=cache, callbacks=callbacks, rate_limiter=get_rate_limiter())
+
+    if _llm_factory is not None:
+        llm, errors = _llm_factory(**kwargs), retryable_errors()
+    elif PROVIDER == "google":
+        # Gemini errors are not classified, so any failure is retried
+        llm, errors = _google_model(**kwargs), (Exception,)
+    elif PROVIDER == "openai":
+        llm, errors = _openai_model(**kwargs), retryable_errors()
+    else:
+        raise ValueError(f"Unknown LLM_PROVIDER '{PROVIDER}' (expected 'openai' or 'google')")
+
+    return llm.with_retry(
+        retry_if_exception_type=errors,
+        wait_exponential_jitter=True,
+        exponential_jitter_params={"initial": 0.5, "max": 10},
+        stop_after_attempt=MAX_ATTEMPTS,
+    )
+
+
+def call_llm(prompt: str) -> str:
+    """Call LLM with retries; repeated prompts are served from the cache."""
     llm = get_llm()
     response = llm.invoke(prompt)
-    output = response.content if hasattr(response, "content") else str(response)
-
-    _llm_cache[prompt] = output
-    return output
+    return response.content if hasattr(response, "content") else str(response)
 
 
 # ---- Prompt Helpers ----
@@ -0,0 +1,154 @@
+# tools/llm_cache.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from tools.local_store import cache_path
+
+DEFAULT_TTL_S = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class SQLiteLLMCache(BaseCache):
+    """On-disk, content-addressed cache for chat model responses.
+
+    Entries are keyed by a hash of the model settings (`llm_string`, which
+    carries model name and temperature) and the rendered prompt, so format
+    instructions are part of the key. Expired entries are treated as misses
+    and the least recently used rows are evicted once `max_entries` is hit.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path or cache_path("llm_cache.sqlite")
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Shared across the worker threads used for async lookups
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON llm_cache(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_s:
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return _loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, _dumps(return_val), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_s,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def _dumps(generations: Sequence[Generation]) -> str:
+    out = []
+    for g in generations:
+        if isinstance(g, ChatGeneration):
+            out.append({"text": g.text, "message": message_to_dict(g.message)})
+        else:
+            out.append({"text": g.text})
+    return json.dumps(out)
+
+
+def _loads(value: str) -> RETURN_VAL_TYPE:
+    generations = []
+    for g in json.loads(value):
+        if "message" in g:
+            generations.append(ChatGeneration(
+                message=messages_from_dict([g["message"]])[0],
+                generation_info={"cache_hit": True},
+            ))
+        else:
+            generations.append(Generation(text=g["text"], generation_info={"cache_hit": True}))
+    return generations
+
+
+_cache: SQLiteLLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    """The cache can be bypassed with LLM_CACHE=off."""
+    return os.getenv("LLM_CACHE", "on").lower() not in ("0", "off", "false", "no")
+
+
+def get_llm_cache() -> SQLiteLLMCache:
+    """Return the process-wide response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteLLMCache(
+                ttl_s=float(os.getenv("LLM_CACHE_TTL_S", DEFAULT_TTL_S)),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _cache
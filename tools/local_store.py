@@ -0,0 +1,41 @@
+# tools/local_store.py
+from __future__ import annotations
+import json
+import os
+import tempfile
+from typing import Any
+
+# All on-disk caches and checkpoints live under one directory
+CACHE_DIR = os.getenv("ASSISTANT_CACHE_DIR", ".cache")
+
+
+def cache_path(*parts: str) -> str:
+    """Return a path inside the cache directory, creating parent folders."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """Read a JSON file, returning `default` if it is missing or corrupt."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str, data: Any) -> None:
+    """Atomically write JSON so a crash never leaves a half-written file."""
+    # a unique temp file per write, so concurrent writers never replace each other's
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
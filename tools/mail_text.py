@@ -0,0 +1,153 @@
+# tools/mail_text.py
+from __future__ import annotations
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import List, Tuple
+
+from tools.tokens import count_tokens, truncate_to_tokens
+
+MAX_BODY_CHARS = 8000
+
+_BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "table", "blockquote", "hr"}
+_SKIP_TAGS = {"script", "style", "head", "title", "noscript"}
+
+# Links worth keeping inline because downstream agents act on them
+_KEEP_LINK = re.compile(r"https://docs\.google\.com/")
+
+# Lines that start a quoted reply chain; everything after them is history
+_REPLY_HEADERS = [
+    re.compile(r"^On .{0,200}wrote:\s*$"),
+    re.compile(r"^-{2,}\s*Original Message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^_{20,}\s*$"),
+]
+# Outlook-style header block, confirmed by a following Sent:/Date: line
+_OUTLOOK_FROM = re.compile(r"^From: .+$")
+_FORWARDED = re.compile(r"forwarded message", re.IGNORECASE)
+_SIGNATURE = [
+    re.compile(r"^-- ?$"),
+    re.compile(r"^Sent from my (iPhone|iPad|Android|mobile)", re.IGNORECASE),
+    re.compile(r"^Get Outlook for ", re.IGNORECASE),
+]
+# Footer lines that carry no meaning for classification
+_BOILERPLATE = re.compile(
+    r"^(this (e-?mail|message)( and any attachments?)? (is|are|may be) (confidential|privileged|intended)"
+    r"|if you (are not|have received this).{0,40}(intended recipient|in error)"
+    r"|view (this email )?in (your )?browser"
+    r"|(copyright )?(©|\(c\)) ?\d{4}|all rights reserved|privacy policy"
+    r"|please consider the environment before printing)",
+    re.IGNORECASE,
+)
+_LONG_URL = re.compile(r"(https?://[^/\s]+)/\S{40,}")
+
+
+class _TextExtractor(HTMLParser):
+    """Streaming HTML-to-text converter that stops once `max_chars` is reached."""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.size = 0
+        self.skip_depth = 0
+        self.full = False
+
+    def _emit(self, text: str) -> None:
+        if self.full or not text:
+            return
+        room = self.max_chars - self.size
+        if len(text) >= room:
+            text, self.full = text[:room], True
+        self.parts.append(text)
+        self.size += len(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._emit("\n")
+        elif tag == "a":
+            href = dict(attrs).get("href") or ""
+            if _KEEP_LINK.match(href):
+                self._emit(f" {href} ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in _BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._emit(re.sub(r"[ \t\r\f\v\xa0]+", " ", data))
+
+
+def html_to_text(html: str, max_chars: int = MAX_BODY_CHARS, chunk_size: int = 8192) -> str:
+    """Convert HTML to compact text without building a DOM.
+
+    The markup is fed in chunks and parsing stops as soon as `max_chars`
+    of text have been produced, so huge newsletters cost a bounded amount.
+    """
+    parser = _TextExtractor(max_chars)
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.full:
+            break
+    parser.close()
+    text = unescape("".join(parser.parts))
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def strip_quoted(text: str) -> str:
+    """Drop quoted reply history and trailing signatures from a plain-text body.
+
+    Forwarded messages are kept, since the forwarded content is usually
+    what the user needs to act on.
+    """
+    lines = text.splitlines()
+    kept: List[str] = []
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith(">"):
+            continue
+        if any(p.match(stripped) for p in _REPLY_HEADERS):
+            break
+        if _OUTLOOK_FROM.match(stripped) and not _FORWARDED.search(lines[idx - 1] if idx else ""):
+            following = " ".join(l.strip() for l in lines[idx + 1:idx + 3])
+            if re.search(r"\b(Sent|Date):", following):
+                break
+        if any(p.match(stripped) for p in _SIGNATURE):
+            break
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def extract_text(raw: str, subtype: str, max_chars: int = MAX_BODY_CHARS) -> str:
+    """Return a bounded, reply-free text body from a decoded text/plain or text/html part."""
+    if subtype == "html":
+        raw = html_to_text(raw, max_chars=max_chars)
+    return strip_quoted(raw[:max_chars])
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop legal/footer lines, shorten tracking URLs and squeeze blank runs."""
+    lines = [l for l in text.splitlines() if not _BOILERPLATE.match(l.strip())]
+    text = "\n".join(lines)
+    # keep Docs links whole, downstream agents act on them
+    text = _LONG_URL.sub(lambda m: m.group(0) if _KEEP_LINK.match(m.group(0)) else m.group(1) + "/...", text)
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+def build_email_prompt(subject: str, body: str, budget: int) -> Tuple[str, int, int]:
+    """Prompt text for one email within `budget` tokens.
+
+    The newest message comes first and quoted history and boilerplate are
+    removed before the text is truncated. Returns (text, tokens, tokens before
+    truncation).
+    """
+    text = f"Subject: {subject}\n\n{strip_boilerplate(strip_quoted(body))}"
+    full = count_tokens(text)
+    if full > budget:
+        text = truncate_to_tokens(text, budget)
+        return text, count_tokens(text), full
+    return text, full, full
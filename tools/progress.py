@@ -0,0 +1,136 @@
+# tools/progress.py
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from agents.schemas import Summary, Task
+from tools.local_store import cache_path
+
+# Unfinished runs older than this are abandoned instead of resumed
+RESUME_WINDOW_S = 24 * 3600
+# A run whose owner has not renewed its lease for this long is taken to be dead
+LEASE_S = 30
+
+
+class ProgressStore:
+    """Durable record of pipeline runs and of each email's result within a run.
+
+    Results are written as soon as an email is classified, so a run that
+    dies halfway can be resumed without classifying those emails again.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or cache_path("progress.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                finished INTEGER NOT NULL DEFAULT 0,
+                started_at REAL NOT NULL,
+                lease_until REAL NOT NULL DEFAULT 0
+            )"""
+        )
+        if "lease_until" not in [r[1] for r in self._conn.execute("PRAGMA table_info(runs)")]:
+            self._conn.execute("ALTER TABLE runs ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_key ON runs(key, started_at)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS emails (
+                run_id TEXT NOT NULL,
+                email_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (run_id, email_id)
+            )"""
+        )
+        self._conn.commit()
+
+    def claim_unfinished_run(self, key: str) -> Optional[str]:
+        """Take over the latest run for `key` if it never finished and its owner is gone.
+
+        A run that is still leased (running in another session or process) is
+        left alone. The claim is a single conditional UPDATE, so two callers
+        never resume the same run.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT run_id, finished, lease_until FROM runs WHERE key = ? AND started_at > ? ORDER BY started_at DESC LIMIT 1",
+                (key, now - RESUME_WINDOW_S),
+            ).fetchone()
+            if not row or row[1] or row[2] > now:
+                return None
+            claimed = self._conn.execute(
+                "UPDATE runs SET lease_until = ? WHERE run_id = ? AND finished = 0 AND lease_until <= ?",
+                (now + LEASE_S, row[0], now),
+            ).rowcount
+        return row[0] if claimed else None
+
+    def start_run(self, key: str, run_id: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO runs VALUES (?, ?, 0, ?, ?)", (run_id, key, now, now + LEASE_S))
+
+    def renew_lease(self, run_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET lease_until = ? WHERE run_id = ?", (time.time() + LEASE_S, run_id))
+
+    def release_run(self, run_id: str) -> None:
+        """Give up the lease on a run that failed, so the next call resumes it straight away."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET lease_until = 0 WHERE run_id = ?", (run_id,))
+
+    def finish_run(self, run_id: str) -> None:
+        """Mark a run finished and drop its per-email results."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE runs SET finished = 1 WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM emails WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE started_at < ?", (time.time() - RESUME_WINDOW_S,))
+            self._conn.execute("DELETE FROM emails WHERE run_id NOT IN (SELECT run_id FROM runs)")
+
+    def record_email(self, run_id: str, email_id: str, result: dict) -> None:
+        """Store one email's {summaries, tasks, logs}; failed emails are retried on resume."""
+        failed = any(line.startswith("ERROR") for line in result["logs"])
+        data = {
+            "summaries": [s.model_dump() for s in result["summaries"]],
+            "tasks": [t.model_dump() for t in result["tasks"]],
+            "logs": result["logs"],
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO emails VALUES (?, ?, ?, ?)",
+                (run_id, str(email_id), "failed" if failed else "done", json.dumps(data)),
+            )
+
+    def email_results(self, run_id: str) -> Dict[str, dict]:
+        """Results of the emails a run has already classified, by email id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email_id, result FROM emails WHERE run_id = ? AND status = 'done'", (run_id,)
+            ).fetchall()
+        results = {}
+        for email_id, raw in rows:
+            data = json.loads(raw)
+            results[email_id] = {
+                "summaries": [Summary(**s) for s in data["summaries"]],
+                "tasks": [Task(**t) for t in data["tasks"]],
+                "logs": data["logs"],
+            }
+        return results
+
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProgressStore()
+    return _store
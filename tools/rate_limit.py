@@ -0,0 +1,249 @@
+# tools/rate_limit.py
+from __future__ import annotations
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+# Poll interval while waiting for a free slot or a refill
+CHECK_EVERY_S = 0.05
+# Back off when the server reports less than this share of a quota left
+LOW_WATERMARK = 0.05
+
+
+def _duration_s(value: Optional[str]) -> float:
+    """Parse OpenAI reset durations such as '20ms', '1s' or '6m0s'."""
+    if not value:
+        return 0.0
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(n) * units[u] for n, u in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value))
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute`; unlimited until a limit is known.
+
+    A configured `per_minute` is a cap: the server's limit can lower it but
+    never raise it, since it may be this process's share of the account quota.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.cap = per_minute
+        self.per_minute = per_minute
+        self.level = per_minute or 0.0
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.per_minute:
+            self.level = min(self.per_minute, self.level + (now - self.stamp) * self.per_minute / 60)
+        self.stamp = now
+
+    def wait_s(self, amount: float, now: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        # a single request larger than the whole bucket only waits for a full one
+        amount = min(amount, self.per_minute)
+        return max(0.0, (amount - self.level) * 60 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        if self.per_minute:
+            self.level -= amount
+
+    def sync(self, limit: Optional[str], remaining: Optional[str], now: float) -> None:
+        """Adopt the server's view of the quota from x-ratelimit-* headers."""
+        learned = limit and not self.per_minute
+        if limit:
+            self.per_minute = min(self.cap, float(limit)) if self.cap else float(limit)
+        if remaining and self.per_minute:
+            self._refill(now)
+            self.level = float(remaining) if learned else min(self.level, float(remaining))
+
+
+class AdaptiveRateLimiter(BaseRateLimiter):
+    """Shared requests/tokens-per-minute budget with an AIMD concurrency window.
+
+    A call may start once a concurrency slot is free, one request is in
+    the request bucket and the expected token cost is in the token bucket.
+    Token use is estimated up front and corrected from `usage_metadata`
+    when the call finishes. Both buckets follow the `x-ratelimit-*`
+    response headers, so the budget tracks the real quota even when
+    other processes share the key.
+
+    The window grows by about one slot per window of successful calls and
+    halves on a 429, which also pauses new calls until the reported reset.
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_concurrency: int = 16,
+        initial_concurrency: int = 8,
+        estimated_tokens: int = 800,
+    ):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.window = float(min(initial_concurrency, max_concurrency))
+        self.in_flight = 0
+        self.estimated_tokens = float(estimated_tokens)
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """Take a slot and return 0, or return how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.window):
+                return CHECK_EVERY_S
+            wait = max(self.requests.wait_s(1, now), self.tokens.wait_s(self.estimated_tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(self.estimated_tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return True
+            if not blocking:
+                return False
+            time.sleep(min(wait, 1.0))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(min(wait, 1.0))
+
+    def on_success(self, total_tokens: int, headers: Mapping[str, str]) -> None:
+        """Release a slot, settle the token estimate and widen the window."""
+        with self._lock:
+            now = time.monotonic()
+            self.in_flight = max(0, self.in_flight - 1)
+            self.completed += 1
+            if total_tokens:
+                self.tokens.take(total_tokens - self.estimated_tokens)
+                self.estimated_tokens = 0.8 * self.estimated_tokens + 0.2 * total_tokens
+            self.requests.sync(headers.get("x-ratelimit-limit-requests"), headers.get("x-ratelimit-remaining-requests"), now)
+            self.tokens.sync(headers.get("x-ratelimit-limit-tokens"), headers.get("x-ratelimit-remaining-tokens"), now)
+            if self._near_quota(headers):
+                self.window = max(1.0, self.window * 0.75)
+            else:
+                self.window = min(float(self.max_concurrency), self.window + 1 / self.window)
+
+    def on_error(self, error: BaseException) -> None:
+        """Release a slot; on a 429 halve the window and pause until the quota resets."""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if getattr(error, "status_code", None) != 429:
+                return
+            self.throttled += 1
+            self.window = max(1.0, self.window / 2)
+            headers = getattr(getattr(error, "response", None), "headers", None) or {}
+            retry_after = (
+                float(headers["retry-after-ms"]) / 1000 if headers.get("retry-after-ms")
+                else float(headers.get("retry-after") or 0)
+                or max(_duration_s(headers.get("x-ratelimit-reset-requests")), _duration_s(headers.get("x-ratelimit-reset-tokens")))
+                or 1.0
+            )
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    @staticmethod
+    def _near_quota(headers: Mapping[str, str]) -> bool:
+        for kind in ("requests", "tokens"):
+            limit, remaining = headers.get(f"x-ratelimit-limit-{kind}"), headers.get(f"x-ratelimit-remaining-{kind}")
+            if limit and remaining and float(remaining) < LOW_WATERMARK * float(limit):
+                return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window": round(self.window, 2),
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "throttled": self.throttled,
+                "rpm": self.requests.per_minute,
+                "tpm": self.tokens.per_minute,
+                "estimated_tokens": round(self.estimated_tokens),
+            }
+
+
+class RateLimitHandler(BaseCallbackHandler):
+    """Feeds call outcomes (usage, headers, 429s) back into the limiter."""
+
+    run_inline = True
+
+    def __init__(self, limiter: AdaptiveRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        gen = response.generations[0][0] if response.generations and response.generations[0] else None
+        if gen is not None and (gen.generation_info or {}).get("cache_hit"):
+            return  # served from the cache, never acquired a slot
+        message = getattr(gen, "message", None)
+        usage = getattr(message, "usage_metadata", None) or {}
+        headers = (getattr(message, "response_metadata", None) or {}).get("headers") or {}
+        self.limiter.on_success(usage.get("total_tokens", 0), {k.lower(): v for k, v in headers.items()})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.limiter.on_error(error)
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+_handler: Optional[RateLimitHandler] = None
+_lock = threading.Lock()
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = float(os.getenv(name, "0") or 0)
+    return value if value > 0 else None
+
+
+def rate_limit_enabled() -> bool:
+    """Client-side throttling is on unless LLM_RATE_LIMIT=off."""
+    return os.getenv("LLM_RATE_LIMIT", "on").lower() not in ("0", "off", "false", "no")
+
+
+def get_rate_limiter() -> Optional[AdaptiveRateLimiter]:
+    """Return the process-wide LLM budget shared by every chat model from get_llm().
+
+    LLM_RPM / LLM_TPM cap the quotas (otherwise they are learned from the
+    first response headers) and LLM_MAX_CONCURRENCY caps the window.
+    """
+    global _limiter, _handler
+    if not rate_limit_enabled():
+        return None
+    with _lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter(
+                rpm=_env_float("LLM_RPM"),
+                tpm=_env_float("LLM_TPM"),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            )
+            _handler = RateLimitHandler(_limiter)
+        return _limiter
+
+
+def get_rate_limit_handler() -> Optional[RateLimitHandler]:
+    """Callback that must accompany get_rate_limiter() on every model."""
+    get_rate_limiter()
+    return _handler if rate_limit_enabled() else None
@@ -0,0 +1,98 @@
+# tools/scheduler.py
+from __future__ import annotations
+import math
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+
+from tools.freebusy import FreeBusyIndex
+
+PRIORITY_WEIGHT = {"HIGH": 3, "MED": 2, "LOW": 1}
+# Tasks without a due date are planned as if due this many days out (None: end of horizon)
+DEFAULT_DUE_DAYS = {"HIGH": 2, "MED": 7, "LOW": None}
+# Longer tasks are split into balanced chunks of at most this many minutes
+MAX_CHUNK_MIN = 90
+SLOT_MIN = 15
+
+
+@dataclass
+class Schedule:
+    blocks: List[dict] = field(default_factory=list)
+    unscheduled: List[dict] = field(default_factory=list)
+    late: List[dict] = field(default_factory=list)
+
+
+def chunk_minutes(estimate_min: Optional[int], default_min: int, max_chunk: int = MAX_CHUNK_MIN) -> List[int]:
+    """Split a task's estimate into equal chunks, each rounded up to SLOT_MIN."""
+    total = max(SLOT_MIN, estimate_min or default_min)
+    n = math.ceil(total / max_chunk)
+    return [math.ceil(total / n / SLOT_MIN) * SLOT_MIN] * n
+
+
+def _deadline(due_date: Optional[str], work_end: int) -> Optional[datetime]:
+    try:
+        day = date.fromisoformat(due_date) if due_date else None
+    except ValueError:
+        return None
+    return datetime.combine(day, time(work_end), tzinfo=timezone.utc) if day else None
+
+
+def schedule_tasks(
+    tasks: List[dict],
+    index: FreeBusyIndex,
+    now: datetime,
+    horizon: datetime,
+    work_end: int = 18,
+    default_min: int = 60,
+    max_chunk: int = MAX_CHUNK_MIN,
+    buffer: timedelta = timedelta(minutes=15),
+) -> Schedule:
+    """Earliest-deadline-first placement of tasks into the free gaps of `index`.
+
+    Tasks are ordered by deadline, where undated tasks get a deadline from
+    their priority (DEFAULT_DUE_DAYS) and ties go to the higher priority.
+    Each task's chunks are placed in order at the earliest free slots. A task
+    that cannot be placed in full gets no blocks and is reported as
+    unscheduled. A task whose last block ends after its due date is still
+    placed but is also reported as late.
+    """
+    order = []
+    for i, t in enumerate(tasks):
+        priority = t.get("priority") or "MED"
+        due = _deadline(t.get("due_date"), work_end)
+        days = DEFAULT_DUE_DAYS.get(priority, DEFAULT_DUE_DAYS["MED"])
+        target = horizon if days is None else now + timedelta(days=days)
+        order.append((min(due, target) if due else target, -PRIORITY_WEIGHT.get(priority, 2), i, due))
+    order.sort()
+
+    schedule = Schedule()
+    for _, _, i, due in order:
+        t = tasks[i]
+        chunks = chunk_minutes(t.get("estimate_min"), default_min, max_chunk)
+        mark, slots, cursor = index.mark(), [], None
+        for minutes in chunks:
+            slot = index.allocate(timedelta(minutes=minutes), buffer=buffer, not_before=cursor)
+            if slot is None:
+                break
+            slots.append(slot)
+            cursor = slot[1]
+        if len(slots) < len(chunks):
+            # give the partial placement back so later tasks can use it
+            index.rollback(mark)
+            schedule.unscheduled.append(t)
+            continue
+        if due and slots[-1][1] > due:
+            schedule.late.append(t)
+        title = t.get("title", "Task")
+        for n, (start, end) in enumerate(slots, 1):
+            schedule.blocks.append(
+                {
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "title": f"{title} ({n}/{len(slots)})" if len(slots) > 1 else title,
+                    "linked_task_id": t.get("id"),
+                }
+            )
+
+    schedule.blocks.sort(key=lambda b: b["start"])
+    return schedule
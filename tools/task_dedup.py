@@ -0,0 +1,155 @@
+# tools/task_dedup.py
+from __future__ import annotations
+import hashlib
+import random
+import re
+import time
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from agents.schemas import Task
+from tools.local_store import load_json, save_json
+
+NUM_PERM = 64
+# 16 bands x 4 rows: a pair at Jaccard 0.6 shares a bucket ~89% of the time, at 0.2 ~2.5%
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# XOR with a random mask permutes the 64-bit hash space; far cheaper than (a*h + b) mod p
+_MASKS = [random.Random(1337 + i).getrandbits(64) for i in range(NUM_PERM)]
+
+STOPWORDS = {
+    "a", "an", "the", "to", "of", "for", "on", "in", "and", "or", "with", "by", "at", "from",
+    "please", "my", "your", "our", "this", "that", "it", "up",
+}
+
+
+def title_tokens(title: str) -> FrozenSet[str]:
+    """Normalised word set of a task title (stopwords dropped, plural 's' stripped)."""
+    words = re.findall(r"[a-z0-9]+", title.lower())
+    return frozenset(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+                     for w in words if w not in STOPWORDS)
+
+
+def _hash(token: str) -> int:
+    # stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def signature(tokens: FrozenSet[str]) -> List[int]:
+    hashes = [_hash(t) for t in tokens] or [0]
+    return [min(h ^ m for h in hashes) for m in _MASKS]
+
+
+def bands(sig: List[int]) -> List[int]:
+    """One stable 64-bit key per band of ROWS signature values (what gets persisted)."""
+    keys = []
+    for i in range(BANDS):
+        key = i
+        for v in sig[i * ROWS:(i + 1) * ROWS]:
+            key = ((key * 0x100000001B3) ^ v) & 0xFFFFFFFFFFFFFFFF
+        keys.append(key)
+    return keys
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class TaskDedupIndex:
+    """Persistent near-duplicate index over task titles (MinHash + LSH).
+
+    Each task is reduced to a word set and a MinHash signature; LSH
+    buckets on signature bands give candidate matches in roughly constant
+    time per task, and candidates are confirmed with exact Jaccard
+    similarity. Two tasks are duplicates when their titles are at least
+    `threshold` similar, they mention the same numbers and their due dates
+    do not conflict. Entries not seen for `ttl_days` are dropped on load.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.6, ttl_days: int = 90):
+        self.path = path
+        self.threshold = threshold
+        self.entries: Dict[str, dict] = {}
+        self.buckets: Dict[int, Set[str]] = {}
+        cutoff = time.time() - ttl_days * 86400
+        for key, entry in load_json(path, {}).items():
+            if entry.get("seen", 0) >= cutoff:
+                self._add(key, entry)
+
+    def _add(self, key: str, entry: dict) -> None:
+        self.entries[key] = entry
+        for band in entry["bands"]:
+            self.buckets.setdefault(band, set()).add(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry:
+            for band in entry["bands"]:
+                self.buckets.get(band, set()).discard(key)
+
+    def _match(self, key: str, tokens: FrozenSet[str], band_keys: List[int], due_date: Optional[str]) -> Optional[str]:
+        numbers = {t for t in tokens if t.isdigit()}
+        candidates = set().union(*(self.buckets.get(b, ()) for b in band_keys)) - {key}
+        best, best_score = None, self.threshold
+        for other in candidates:
+            entry = self.entries[other]
+            other_tokens = frozenset(entry["tokens"])
+            if {t for t in other_tokens if t.isdigit()} != numbers:
+                continue
+            if due_date and entry.get("due_date") and due_date != entry["due_date"]:
+                continue
+            score = jaccard(tokens, other_tokens)
+            if score >= best_score:
+                best, best_score = other, score
+        return best
+
+    def dedupe(self, tasks: List[Task]) -> Tuple[List[Task], Dict[str, Task], List[str]]:
+        """Drop near-duplicates within `tasks` and against earlier runs, keeping the highest-confidence variant.
+
+        Returns (kept, earlier, logs). A task that repeats one kept from an
+        earlier run is not in `kept`; `earlier` maps that task's id to it, so
+        the caller can use the stored task instead.
+        """
+        kept: List[Task] = []
+        earlier: Dict[str, Task] = {}
+        slot: Dict[str, int] = {}
+        logs: List[str] = []
+        now = time.time()
+
+        for task in tasks:
+            key = task.id or task.title
+            if key in slot:
+                continue
+            tokens = title_tokens(task.title)
+            entry = {"title": task.title, "due_date": task.due_date, "confidence": task.confidence or 0.0,
+                     "tokens": sorted(tokens), "bands": bands(signature(tokens)), "seen": now}
+            match = self._match(key, tokens, entry["bands"], task.due_date)
+
+            if match is None:
+                self._remove(key)
+                self._add(key, entry)
+                slot[key] = len(kept)
+                kept.append(task)
+                continue
+
+            other = self.entries[match]
+            origin = "" if match in slot else " (seen in an earlier run)"
+            if entry["confidence"] > other["confidence"]:
+                if match in slot:
+                    idx = slot.pop(match)
+                    kept[idx], slot[key] = task, idx
+                else:
+                    slot[key] = len(kept)
+                    kept.append(task)
+                self._remove(match)
+                self._add(key, entry)
+                logs.append(f"Merged duplicate task '{other['title']}'{origin} into '{task.title}'")
+            else:
+                other["seen"] = now
+                if match not in slot:
+                    earlier.setdefault(match, task)
+                logs.append(f"Merged duplicate task '{task.title}' into '{other['title']}'{origin}")
+
+        return kept, earlier, logs
+
+    def save(self) -> None:
+        save_json(self.path, self.entries)
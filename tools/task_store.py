@@ -0,0 +1,216 @@
+# tools/task_store.py
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agents.schemas import Task
+from tools.local_store import cache_path
+
+# Tasks due within this many days (or overdue) are in the "due" bucket
+DUE_SOON_DAYS = 2
+# Columns that come from extraction; a change in any of them means the task changed
+CONTENT = ("title", "source", "source_id", "due_raw", "due_date", "estimate_min", "confidence")
+COLUMNS = ("id",) + CONTENT + ("priority", "status")
+# Stay well under SQLite's bound-parameter limit
+_BATCH = 500
+
+
+def deadline_bucket(due_date: Optional[str], today: date) -> str:
+    """"due" (overdue or within DUE_SOON_DAYS), "later", "none" or "invalid"."""
+    if not due_date:
+        return "none"
+    try:
+        due = datetime.strptime(due_date, "%Y-%m-%d").date()
+    except ValueError:
+        return "invalid"
+    return "due" if (due - today).days <= DUE_SOON_DAYS else "later"
+
+
+def source_id(task: Task) -> Optional[str]:
+    """Email uid a task came from (ids look like "<uid>_<n>" or "<uid>_mt_<n>")."""
+    return task.id.split("_", 1)[0] if task.id and "_" in task.id else None
+
+
+class TaskStore:
+    """SQLite-backed history of extracted tasks, one row per (account, task id).
+
+    Rows remember the priority a task was given and the deadline bucket it
+    was in at the time, so later runs only re-prioritise tasks that are new,
+    changed, or have moved into a different bucket as days pass.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or cache_path("tasks.sqlite")
+        self._lock = threading.Lock()
+        # Shared by the batch runner's threads; other processes wait on the file lock
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tasks (
+                account TEXT NOT NULL,
+                id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                source TEXT,
+                source_id TEXT,
+                due_raw TEXT,
+                due_date TEXT,
+                estimate_min INTEGER,
+                confidence REAL,
+                priority TEXT NOT NULL,
+                status TEXT NOT NULL,
+                bucket TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (account, id)
+            )"""
+        )
+        for name, cols in (
+            ("idx_tasks_due", "account, due_date"),
+            ("idx_tasks_priority", "account, priority, due_date"),
+            ("idx_tasks_status", "account, status, due_date"),
+            ("idx_tasks_source", "account, source_id, due_date"),
+            ("idx_tasks_bucket", "account, bucket, due_date"),
+        ):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON tasks({cols})")
+        self._conn.commit()
+
+    @staticmethod
+    def _values(task: Task) -> tuple:
+        return (task.title, task.source, source_id(task), task.due_raw, task.due_date,
+                task.estimate_min, task.confidence)
+
+    def _existing(self, account: str, ids: List[str]) -> Dict[str, tuple]:
+        found = {}
+        for i in range(0, len(ids), _BATCH):
+            chunk = ids[i:i + _BATCH]
+            rows = self._conn.execute(
+                f"SELECT id, {', '.join(CONTENT)} FROM tasks WHERE account = ? AND id IN ({','.join('?' * len(chunk))})",
+                (account, *chunk),
+            )
+            found.update((r[0], tuple(r[1:])) for r in rows)
+        return found
+
+    def upsert(self, account: str, tasks: Iterable[Task]) -> Tuple[int, int, int]:
+        """Insert new tasks and update changed ones; returns (new, changed, unchanged).
+
+        Changed rows lose their bucket so the next `stale()` call picks them
+        up; status is kept so a task's progress survives re-extraction.
+        """
+        by_id = {t.id or t.title: t for t in tasks}
+        now = time.time()
+        with self._lock:
+            existing = self._existing(account, list(by_id))
+            inserts, updates = [], []
+            for key, task in by_id.items():
+                values = self._values(task)
+                if key not in existing:
+                    inserts.append((account, key, *values, task.priority, task.status, now, now))
+                elif existing[key] != values:
+                    updates.append((*values, now, account, key))
+            with self._conn:
+                self._conn.executemany(
+                    f"""INSERT INTO tasks (account, id, {', '.join(CONTENT)}, priority, status, created_at, updated_at)
+                        VALUES ({','.join('?' * (len(CONTENT) + 6))})""",
+                    inserts,
+                )
+                self._conn.executemany(
+                    f"""UPDATE tasks SET {', '.join(f'{c} = ?' for c in CONTENT)}, bucket = NULL, updated_at = ?
+                        WHERE account = ? AND id = ?""",
+                    updates,
+                )
+        return len(inserts), len(updates), len(by_id) - len(inserts) - len(updates)
+
+    def stale(self, account: str, today: date | None = None) -> List[Task]:
+        """Open tasks never prioritised, changed since, or whose deadline bucket moved."""
+        cutoff = ((today or date.today()) + timedelta(days=DUE_SOON_DAYS)).isoformat()
+        select = f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE account = ? AND status != 'DONE' AND "
+        # one index range per branch instead of scanning every row of the account
+        with self._lock:
+            rows = self._conn.execute(
+                f"""{select} bucket IS NULL
+                    UNION ALL {select} bucket = 'later' AND due_date <= ?
+                    UNION ALL {select} bucket = 'due' AND due_date > ?""",
+                (account, account, cutoff, account, cutoff),
+            ).fetchall()
+        return [self._task(r) for r in rows]
+
+    def set_priorities(self, account: str, tasks: Iterable[Task], today: date | None = None) -> None:
+        """Store each task's priority together with its current deadline bucket."""
+        today = today or date.today()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE tasks SET priority = ?, bucket = ?, updated_at = ? WHERE account = ? AND id = ?",
+                [(t.priority, deadline_bucket(t.due_date, today), now, account, t.id or t.title) for t in tasks],
+            )
+
+    def set_status(self, account: str, ids: Iterable[str], status: str) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE tasks SET status = ?, updated_at = ? WHERE account = ? AND id = ?",
+                [(status, now, account, i) for i in ids],
+            )
+
+    def get(self, account: str, ids: List[str]) -> List[Task]:
+        """Tasks by id, in the order given (unknown ids are skipped)."""
+        found = {}
+        with self._lock:
+            for i in range(0, len(ids), _BATCH):
+                chunk = ids[i:i + _BATCH]
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE account = ? AND id IN ({','.join('?' * len(chunk))})",
+                    (account, *chunk),
+                )
+                found.update((r[0], self._task(r)) for r in rows)
+        return [found[i] for i in ids if i in found]
+
+    def query(
+        self,
+        account: str,
+        priority: Optional[str] = None,
+        status: Optional[str] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        source_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Task]:
+        """Filter by priority/status/source and an inclusive ISO due-date range, earliest due first."""
+        where, args = ["account = ?"], [account]
+        for clause, value in (
+            ("priority = ?", priority),
+            ("status = ?", status),
+            ("due_date >= ?", due_from),
+            ("due_date <= ?", due_to),
+            ("source_id = ?", source_id),
+        ):
+            if value is not None:
+                where.append(clause)
+                args.append(value)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE {' AND '.join(where)} ORDER BY due_date"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [self._task(r) for r in rows]
+
+    @staticmethod
+    def _task(row: tuple) -> Task:
+        data = dict(zip(COLUMNS, row))
+        data.pop("source_id")
+        return Task(**data)
+
+
+_store: Optional[TaskStore] = None
+_store_lock = threading.Lock()
+
+
+def get_task_store() -> TaskStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TaskStore()
+    return _store
@@ -0,0 +1,44 @@
+# tools/tokens.py
+from __future__ import annotations
+import functools
+import re
+
+# Encoding used by gpt-4o / gpt-4o-mini
+ENCODING = "o200k_base"
+TRUNCATION_MARK = "\n[... truncated]"
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken encoding, or None when tiktoken is not installed."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(ENCODING)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken, else a ~4 characters per token estimate."""
+    enc = _encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut `text` to at most `budget` tokens, preferring a line or sentence boundary.
+
+    The cut depends only on the text and budget, so the same email always
+    produces the same prompt (and LLM cache key).
+    """
+    if count_tokens(text) <= budget:
+        return text
+    budget = max(1, budget - count_tokens(TRUNCATION_MARK))
+    enc = _encoding()
+    head = enc.decode(enc.encode(text, disallowed_special=())[:budget]) if enc else text[:budget * 4]
+    # back off to a natural break if one is reasonably close to the cut
+    breaks = [m.end() for m in re.finditer(r"\n|[.!?](?=\s)", head)]
+    if breaks and breaks[-1] >= len(head) * 0.8:
+        head = head[:breaks[-1]]
+    return head.rstrip() + TRUNCATION_MARK
@@ -0,0 +1,189 @@
+# tools/tracing.py
+from __future__ import annotations
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from tools.local_store import cache_path
+
+TRACE_FILE = "traces.jsonl"
+
+_current: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+_run_id: str = uuid.uuid4().hex[:12]
+_spans: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    """Spans are recorded unless TRACING=off."""
+    return os.getenv("TRACING", "on").lower() not in ("0", "off", "false", "no")
+
+
+def _record(span: Dict[str, Any]) -> None:
+    with _lock:
+        _spans.append(span)
+        with open(cache_path(TRACE_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(span, default=str) + "\n")
+
+
+def start_run() -> str:
+    """Begin a new traced run; spans recorded afterwards share its run id."""
+    global _run_id
+    with _lock:
+        _run_id = uuid.uuid4().hex[:12]
+        _spans.clear()
+    return _run_id
+
+
+@contextmanager
+def span(name: str, kind: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time a block of work; attributes can be added to the yielded dict."""
+    if not tracing_enabled():
+        yield {}
+        return
+    span_id = uuid.uuid4().hex[:12]
+    parent_id = _current.get()
+    token = _current.set(span_id)
+    record: Dict[str, Any] = dict(attrs)
+    start = time.time()
+    status, error = "ok", None
+    try:
+        yield record
+    except Exception as e:
+        status, error = "error", str(e)
+        raise
+    finally:
+        _current.reset(token)
+        _record({
+            "run_id": _run_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "start": start,
+            "duration_ms": round((time.time() - start) * 1000, 2),
+            "status": status,
+            "error": error,
+            **record,
+        })
+
+
+def traced(kind: str, name: Optional[str] = None):
+    """Decorator that wraps a sync or async function in a span."""
+
+    def decorate(fn):
+        span_name = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+class LLMTraceHandler(BaseCallbackHandler):
+    """Records one span per chat model call with token usage and cache status."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = (time.time(), _current.get())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        start, parent = self._starts.pop(run_id, (time.time(), None))
+        gen = response.generations[0][0] if response.generations and response.generations[0] else None
+        usage = (getattr(getattr(gen, "message", None), "usage_metadata", None) or {}) if gen else {}
+        cache_hit = bool(gen and (gen.generation_info or {}).get("cache_hit"))
+        self._finish(start, parent, "ok", None, {
+            "prompt_tokens": 0 if cache_hit else usage.get("input_tokens", 0),
+            "completion_tokens": 0 if cache_hit else usage.get("output_tokens", 0),
+            "cache_hit": cache_hit,
+        })
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        start, parent = self._starts.pop(run_id, (time.time(), None))
+        self._finish(start, parent, "error", str(error), {})
+
+    def _finish(self, start: float, parent: Optional[str], status: str, error: Optional[str], attrs: dict) -> None:
+        if not tracing_enabled():
+            return
+        _record({
+            "run_id": _run_id,
+            "span_id": uuid.uuid4().hex[:12],
+            "parent_id": parent,
+            "name": "chat_model",
+            "kind": "llm",
+            "start": start,
+            "duration_ms": round((time.time() - start) * 1000, 2),
+            "status": status,
+            "error": error,
+            **attrs,
+        })
+
+
+_handler = LLMTraceHandler()
+
+
+def get_trace_handler() -> LLMTraceHandler:
+    return _handler
+
+
+def get_spans() -> List[Dict[str, Any]]:
+    """Spans recorded since the last start_run()."""
+    with _lock:
+        return list(_spans)
+
+
+def summarise_run() -> Dict[str, Dict[str, Any]]:
+    """Aggregate this run's spans per (kind, name) and append the summary to the trace file."""
+    spans = get_spans()
+    summary: Dict[str, Dict[str, Any]] = {}
+    for s in spans:
+        row = summary.setdefault(f"{s['kind']}:{s['name']}", {
+            "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cache_hits": 0,
+        })
+        row["count"] += 1
+        row["errors"] += s["status"] != "ok"
+        row["total_ms"] = round(row["total_ms"] + s["duration_ms"], 2)
+        row["max_ms"] = max(row["max_ms"], s["duration_ms"])
+        row["prompt_tokens"] += s.get("prompt_tokens", 0)
+        row["completion_tokens"] += s.get("completion_tokens", 0)
+        row["cache_hits"] += bool(s.get("cache_hit"))
+    if spans:
+        with _lock, open(cache_path(TRACE_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"run_id": _run_id, "summary": summary}) + "\n")
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Render a run summary as aligned text lines, slowest stage first."""
+    lines = [f"{'span':<32}{'count':>6}{'total ms':>11}{'max ms':>10}{'tok in':>8}{'tok out':>9}{'hits':>6}{'err':>5}"]
+    for key, row in sorted(summary.items(), key=lambda kv: -kv[1]["total_ms"]):
+        lines.append(
+            f"{key:<32}{row['count']:>6}{row['total_ms']:>11.1f}{row['max_ms']:>10.1f}"
+            f"{row['prompt_tokens']:>8}{row['completion_tokens']:>9}{row['cache_hits']:>6}{row['errors']:>5}"
+        )
+    return lines